@@ -1,14 +1,57 @@
+import asyncio
+import logging
+import logging.handlers
+import math
+import queue
+import time
+
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
-from pydantic import ValidationError
+from fastapi.responses import ORJSONResponse
+from slowapi import _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from sqlalchemy.exc import SQLAlchemyError
 
 from src.api import contacts, utils, auth, users
 from src.conf.config import settings
+from src.exceptions.exceptions import HTTPInternalDatabaseException
+from src.exceptions.middleware import UnexpectedExceptionMiddleware
+from src.services.cache import listen_for_user_invalidations
+from src.services.ratelimit import limiter
+
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_handler = logging.StreamHandler()
+log_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+log_listener = logging.handlers.QueueListener(log_queue, log_handler)
+logging.basicConfig(
+    level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)]
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    Runs the background tasks that live as long as the application.
+    Log records are written to stderr by a listener thread, so request
+    handlers only enqueue them and never block on the stream.
+
+    Args:
+        _ (FastAPI): The application instance.
+    """
+    log_listener.start()
+    listener = asyncio.create_task(listen_for_user_invalidations())
+    yield
+    listener.cancel()
+    log_listener.stop()
 
-app = FastAPI()
 
+app = FastAPI(default_response_class=ORJSONResponse, lifespan=lifespan)
+app.state.limiter = limiter
+
+app.add_middleware(UnexpectedExceptionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -18,26 +61,79 @@ app.add_middleware(
 )
 
 
+VALIDATION_ERROR_EXCLUDED_KEYS = frozenset({"input", "ctx"})
+
+
 @app.exception_handler(RequestValidationError)
-async def validation_exception_handler(_: Request, exc: ValidationError):
+async def validation_exception_handler(_: Request, exc: RequestValidationError):
     """
     Uncaught validation error handler.
+    The rejected input and the error context are left out of the response,
+    which keeps the payload small and always serializable.
 
     Args:
         _ (Request): The incoming request.
-        exc (ValidationError): An instance of the raised ValidationError.
+        exc (RequestValidationError): An instance of the raised RequestValidationError.
 
     Returns:
-        JSONResponse: A JSON response containing the error details.
+        ORJSONResponse: A JSON response containing the error details.
     """
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=400,
         content={
-            "detail": exc.errors(),
+            "detail": [
+                {
+                    key: value
+                    for key, value in error.items()
+                    if key not in VALIDATION_ERROR_EXCLUDED_KEYS
+                }
+                for error in exc.errors()
+            ],
         },
     )
 
 
+@app.exception_handler(RateLimitExceeded)
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """
+    Rate limit handler adding a `Retry-After` header to slowapi's 429 response.
+    slowapi only sends it with `headers_enabled`, which would require every
+    limited route to return a `Response`.
+
+    Args:
+        request (Request): The incoming request.
+        exc (RateLimitExceeded): An instance of the raised RateLimitExceeded.
+
+    Returns:
+        Response: A JSON response with status 429 and the `Retry-After` header.
+    """
+    response = _rate_limit_exceeded_handler(request, exc)
+    if "Retry-After" not in response.headers:
+        limit, keys = request.state.view_rate_limit
+        reset_at, _ = limiter.limiter.get_window_stats(limit, *keys)
+        response.headers["Retry-After"] = str(max(1, math.ceil(reset_at - time.time())))
+    return response
+
+
+@app.exception_handler(SQLAlchemyError)
+async def database_exception_handler(_: Request, exc: SQLAlchemyError):
+    """
+    Uncaught database error handler.
+
+    Args:
+        _ (Request): The incoming request.
+        exc (SQLAlchemyError): An instance of the raised SQLAlchemyError.
+
+    Returns:
+        ORJSONResponse: A JSON response with status 500 containing the error message.
+    """
+    error = HTTPInternalDatabaseException(str(exc))
+    return ORJSONResponse(
+        status_code=error.status_code,
+        content={"detail": error.detail},
+    )
+
+
 app.include_router(utils.router, prefix="/api")
 app.include_router(contacts.router, prefix="/api")
 app.include_router(auth.router, prefix="/api")
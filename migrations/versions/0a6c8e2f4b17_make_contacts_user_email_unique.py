@@ -0,0 +1,58 @@
+"""Make contacts user_id and email unique
+
+Revision ID: 0a6c8e2f4b17
+Revises: f1b3c5d7e902
+Create Date: 2025-04-26 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6c8e2f4b17"
+down_revision: Union[str, None] = "f1b3c5d7e902"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+DUPLICATE_EMAILS_QUERY = sa.text(
+    "SELECT user_id, email, COUNT(*) AS copies FROM contacts "
+    "GROUP BY user_id, email HAVING COUNT(*) > 1 ORDER BY user_id, email"
+)
+
+
+def _check_no_duplicate_emails() -> None:
+    """Fail with a readable message instead of a unique violation mid-upgrade."""
+    if op.get_context().as_sql:
+        return
+
+    duplicates = op.get_bind().execute(DUPLICATE_EMAILS_QUERY).all()
+    if duplicates:
+        listed = ", ".join(
+            f"user_id={row.user_id} email={row.email!r} ({row.copies} rows)"
+            for row in duplicates[:10]
+        )
+        raise RuntimeError(
+            f"Cannot make contacts (user_id, email) unique: {len(duplicates)} "
+            f"duplicated pairs found, e.g. {listed}. Merge or delete the "
+            "duplicate contacts and run the upgrade again."
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _check_no_duplicate_emails()
+    op.drop_index("ix_contacts_user_id_email", table_name="contacts")
+    op.create_index(
+        "ix_contacts_user_id_email", "contacts", ["user_id", "email"], unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_email", table_name="contacts")
+    op.create_index("ix_contacts_user_id_email", "contacts", ["user_id", "email"])
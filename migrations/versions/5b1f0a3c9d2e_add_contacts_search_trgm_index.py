@@ -0,0 +1,36 @@
+"""Add trigram index for contact search
+
+Revision ID: 5b1f0a3c9d2e
+Revises: c74cfeefcdd8
+Create Date: 2025-04-20 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b1f0a3c9d2e"
+down_revision: Union[str, None] = "c74cfeefcdd8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("SET LOCAL maintenance_work_mem = '256MB'")
+    op.create_index(
+        "ix_contacts_search_trgm",
+        "contacts",
+        [sa.text("(first_name || ' ' || last_name || ' ' || email) gin_trgm_ops")],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_search_trgm", table_name="contacts")
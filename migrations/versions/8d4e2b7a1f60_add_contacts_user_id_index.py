@@ -0,0 +1,28 @@
+"""Add index on contacts.user_id
+
+Revision ID: 8d4e2b7a1f60
+Revises: 5b1f0a3c9d2e
+Create Date: 2025-04-21 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8d4e2b7a1f60"
+down_revision: Union[str, None] = "5b1f0a3c9d2e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_contacts_user_id", "contacts", ["user_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id", table_name="contacts")
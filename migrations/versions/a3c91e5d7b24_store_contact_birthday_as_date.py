@@ -0,0 +1,56 @@
+"""Store contact birthday as date
+
+Revision ID: a3c91e5d7b24
+Revises: 8d4e2b7a1f60
+Create Date: 2025-04-22 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3c91e5d7b24"
+down_revision: Union[str, None] = "8d4e2b7a1f60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "contacts",
+        "birthday",
+        existing_type=sa.String(length=10),
+        type_=sa.Date(),
+        existing_nullable=False,
+        postgresql_using="birthday::date",
+    )
+    op.drop_index("ix_contacts_user_id", table_name="contacts")
+    op.create_index(
+        "ix_contacts_user_birthday_mmdd",
+        "contacts",
+        [
+            "user_id",
+            sa.text(
+                "(EXTRACT(month FROM birthday) * 100 + EXTRACT(day FROM birthday))"
+            ),
+        ],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_birthday_mmdd", table_name="contacts")
+    op.create_index("ix_contacts_user_id", "contacts", ["user_id"])
+    op.alter_column(
+        "contacts",
+        "birthday",
+        existing_type=sa.Date(),
+        type_=sa.String(length=10),
+        existing_nullable=False,
+        postgresql_using="to_char(birthday, 'YYYY-MM-DD')",
+    )
@@ -0,0 +1,41 @@
+"""Default users.created_at to now()
+
+Revision ID: c2f6d8e4a901
+Revises: a3c91e5d7b24
+Create Date: 2025-04-23 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2f6d8e4a901"
+down_revision: Union[str, None] = "a3c91e5d7b24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        "users",
+        "created_at",
+        existing_type=sa.DateTime(),
+        existing_nullable=False,
+        server_default=sa.func.now(),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        "users",
+        "created_at",
+        existing_type=sa.DateTime(),
+        existing_nullable=False,
+        server_default=None,
+    )
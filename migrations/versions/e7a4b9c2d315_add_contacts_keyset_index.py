@@ -0,0 +1,30 @@
+"""Add keyset pagination index on contacts
+
+Revision ID: e7a4b9c2d315
+Revises: c2f6d8e4a901
+Create Date: 2025-04-24 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7a4b9c2d315"
+down_revision: Union[str, None] = "c2f6d8e4a901"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_contacts_user_last_name_id", "contacts", ["user_id", "last_name", "id"]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_last_name_id", table_name="contacts")
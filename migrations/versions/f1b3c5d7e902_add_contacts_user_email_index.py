@@ -0,0 +1,28 @@
+"""Add index on contacts user_id and email
+
+Revision ID: f1b3c5d7e902
+Revises: e7a4b9c2d315
+Create Date: 2025-04-25 10:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1b3c5d7e902"
+down_revision: Union[str, None] = "e7a4b9c2d315"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_contacts_user_id_email", "contacts", ["user_id", "email"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_email", table_name="contacts")
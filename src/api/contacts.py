@@ -1,25 +1,16 @@
 from typing import List
 from fastapi import APIRouter, Query, Depends, status, Response
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.exc import SQLAlchemyError
-from fastapi import HTTPException
 
-from src.database.db import get_db
+from src.api.deps import get_contacts_reader_service, get_contacts_service
 from src.services.contacts import ContactsService
 from src.schemas.contacts import (
+    CONTACT_LIST_ADAPTER,
     ContactBase,
     ContactUpdate,
     ContactResponse,
 )
 
-from src.schemas.users import UserBase
-from src.services.auth import get_current_user
-
-from src.exceptions.exceptions import (
-    HTTPInternalDatabaseException,
-    HTTPInternalUnexpectedException,
-    HTTPNotFoundException,
-)
+from src.exceptions.exceptions import HTTPNotFoundException
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
@@ -40,35 +31,56 @@ async def get_contacts(
     limit: int | None = Query(
         default=None, description="Maximum number of records to retrieve."
     ),
-    db: AsyncSession = Depends(get_db),
-    user: UserBase = Depends(get_current_user),
+    cursor: str | None = Query(
+        default=None,
+        description="Continue after the page that returned this `X-Next-Cursor` header.",
+    ),
+    contacts_service: ContactsService = Depends(get_contacts_reader_service),
 ):
     """
     Retrieve a list of Contacts, with optional filters for search, birthdays, pagination, and user authentication.
+    The total number of matching contacts is returned in the `X-Total-Count` header for requests without a cursor.
+    When a full page is returned, the `X-Next-Cursor` header holds the cursor of the next page.
+    The page is validated and encoded to JSON in one pass by `CONTACT_LIST_ADAPTER`.
 
     Args:
         search (str, optional): A filter for searching contacts by their first name, last name, or email.
         birthdays_within_days (int, optional): Find contacts whose birthdays are within the given number of upcoming days.
         skip (int, optional): The number of records to skip from the beginning.
         limit (int, optional): The maximum number of records to retrieve.
-        db (AsyncSession): The database session used to interact with the database.
-        user (UserBase): The current authenticated user.
+        cursor (str, optional): The cursor of the page to retrieve.
+        contacts_service (ContactsService): The contacts service of the current user.
 
     Returns:
-        List[ContactResponse]: A list of contacts matching the given filters.
+        Response: A JSON list of contacts matching the given filters.
     """
-    try:
-        contacts_service = ContactsService(db, user)
-        return await contacts_service.get_all(
+    headers = {}
+    if cursor is None:
+        contacts, total = await contacts_service.get_all_with_total(
+            search=search,
+            birthdays_within_days=birthdays_within_days,
+            skip=skip,
+            limit=limit,
+        )
+        headers["X-Total-Count"] = str(total)
+    else:
+        contacts = await contacts_service.get_all(
             search=search,
             birthdays_within_days=birthdays_within_days,
             skip=skip,
             limit=limit,
+            cursor=cursor,
         )
-    except SQLAlchemyError as e:
-        raise HTTPInternalDatabaseException(str(e))
-    except Exception as e:
-        raise HTTPInternalUnexpectedException(str(e))
+
+    if limit and len(contacts) == limit:
+        headers["X-Next-Cursor"] = ContactsService.encode_cursor(contacts[-1])
+
+    page = CONTACT_LIST_ADAPTER.validate_python(contacts, from_attributes=True)
+    return Response(
+        content=CONTACT_LIST_ADAPTER.dump_json(page),
+        media_type="application/json",
+        headers=headers,
+    )
 
 
 @router.get(
@@ -77,32 +89,22 @@ async def get_contacts(
 )
 async def get_contact_by_id(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
-    user: UserBase = Depends(get_current_user),
+    contacts_service: ContactsService = Depends(get_contacts_reader_service),
 ):
     """
     Retrieve a Contact by its ID.
 
     Args:
         contact_id (int): The ID of the contact to retrieve.
-        db (AsyncSession): The database session used to interact with the database.
-        user (UserBase): The current authenticated user.
+        contacts_service (ContactsService): The contacts service of the current user.
 
     Returns:
         ContactResponse: The contact details for the given contact ID.
     """
-    try:
-        contacts_service = ContactsService(db, user)
-        contact = await contacts_service.get_by_id(contact_id)
-        if contact is None:
-            raise HTTPNotFoundException("Contact not found")
-        return contact
-    except HTTPException as e:
-        raise e
-    except SQLAlchemyError as e:
-        raise HTTPInternalDatabaseException(str(e))
-    except Exception as e:
-        raise HTTPInternalUnexpectedException(str(e))
+    contact = await contacts_service.get_by_id(contact_id)
+    if contact is None:
+        raise HTTPNotFoundException("Contact not found")
+    return contact
 
 
 @router.post(
@@ -112,28 +114,19 @@ async def get_contact_by_id(
 )
 async def create_contact(
     body: ContactBase,
-    db: AsyncSession = Depends(get_db),
-    user: UserBase = Depends(get_current_user),
+    contacts_service: ContactsService = Depends(get_contacts_service),
 ):
     """
     Create a new Contact.
 
     Args:
         body (ContactBase): The data for the new contact.
-        db (AsyncSession): The database session used to interact with the database.
-        user (UserBase): The current authenticated user.
+        contacts_service (ContactsService): The contacts service of the current user.
 
     Returns:
         ContactResponse: The details of the newly created contact.
     """
-    try:
-        contacts_service = ContactsService(db, user)
-        return await contacts_service.create(body)
-
-    except SQLAlchemyError as e:
-        raise HTTPInternalDatabaseException(str(e))
-    except Exception as e:
-        raise HTTPInternalUnexpectedException(str(e))
+    return await contacts_service.create(body)
 
 
 @router.patch(
@@ -143,8 +136,7 @@ async def create_contact(
 async def update_contact_by_id(
     body: ContactUpdate,
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
-    user: UserBase = Depends(get_current_user),
+    contacts_service: ContactsService = Depends(get_contacts_service),
 ):
     """
     Update an existing Contact by its ID.
@@ -152,20 +144,13 @@ async def update_contact_by_id(
     Args:
         body (ContactUpdate): The data to update the contact with.
         contact_id (int): The ID of the contact to update.
-        db (AsyncSession): The database session used to interact with the database.
-        user (UserBase): The current authenticated user.
+        contacts_service (ContactsService): The contacts service of the current user.
 
     Returns:
         ContactResponse: The updated contact details.
     """
-    try:
-        contacts_service = ContactsService(db, user)
-        contact = await contacts_service.update_by_id(contact_id, body)
-        return contact
-    except SQLAlchemyError as e:
-        raise HTTPInternalDatabaseException(str(e))
-    except Exception as e:
-        raise HTTPInternalUnexpectedException(str(e))
+    contact = await contacts_service.update_by_id(contact_id, body)
+    return contact
 
 
 @router.delete(
@@ -174,29 +159,17 @@ async def update_contact_by_id(
 )
 async def delete_contact_by_id(
     contact_id: int,
-    db: AsyncSession = Depends(get_db),
-    user: UserBase = Depends(get_current_user),
+    contacts_service: ContactsService = Depends(get_contacts_service),
 ):
     """
     Delete a Contact by its ID.
 
     Args:
         contact_id (int): The ID of the contact to delete.
-        db (AsyncSession): The database session used to interact with the database.
-        user (UserBase): The current authenticated user.
+        contacts_service (ContactsService): The contacts service of the current user.
 
     Returns:
         Response: A response with status code 204 (No Content) indicating successful deletion.
     """
-    try:
-        contacts_service = ContactsService(db, user)
-        contact = await contacts_service.get_by_id(contact_id)
-        if contact is None:
-            raise HTTPNotFoundException("Contact not found")
-
-        await contacts_service.delete_by_id(contact_id)
-        return Response(status_code=status.HTTP_204_NO_CONTENT)
-    except SQLAlchemyError as e:
-        raise HTTPInternalDatabaseException(str(e))
-    except Exception as e:
-        raise HTTPInternalUnexpectedException(str(e))
+    await contacts_service.delete_by_id_returning(contact_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,44 @@
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.db import get_db
+from src.schemas.users import UserBase
+from src.services.auth import TokenUser, get_current_user, get_current_user_id
+from src.services.contacts import ContactsService
+from src.services.users import get_user_service
+
+
+def get_contacts_service(
+    db: AsyncSession = Depends(get_db),
+    user: UserBase = Depends(get_current_user),
+) -> ContactsService:
+    """
+    Provide a ContactsService bound to the request's session and authenticated user.
+
+    Args:
+        db (AsyncSession): The database session of the current request.
+        user (UserBase): The current authenticated user.
+
+    Returns:
+        ContactsService: The service instance shared by the request.
+    """
+    return ContactsService(db, user)
+
+
+def get_contacts_reader_service(
+    db: AsyncSession = Depends(get_db),
+    user: TokenUser = Depends(get_current_user_id),
+) -> ContactsService:
+    """
+    Provide a ContactsService for read-only endpoints, scoped by the user ID in the token.
+
+    Unlike `get_contacts_service` it skips loading the full user from Redis or the database.
+
+    Args:
+        db (AsyncSession): The database session of the current request.
+        user (TokenUser): The ID of the current authenticated user.
+
+    Returns:
+        ContactsService: The service instance shared by the request.
+    """
+    return ContactsService(db, user)
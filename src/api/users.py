@@ -1,17 +1,17 @@
 from fastapi import APIRouter, Depends, File, UploadFile, Request
-from slowapi import Limiter
-from slowapi.util import get_remote_address
-from sqlalchemy.ext.asyncio import AsyncSession
-from src.database.db import get_db
 
+from src.api.deps import get_user_service
 from src.schemas.users import UserBase
-from src.services.auth import get_current_user, get_current_user_admin
-from src.services.cache import update_cached_current_user
+from src.services.auth import (
+    get_current_user,
+    get_current_user_admin,
+    invalidate_cached_tokens,
+)
+from src.services.ratelimit import limiter
 from src.services.users import UserService
-from src.services.upload import UploadService, CloudinaryUploadService
+from src.services.upload import default_upload_service
 
 router = APIRouter(prefix="/users", tags=["users"])
-limiter = Limiter(key_func=get_remote_address)
 
 
 @router.get("/me", response_model=UserBase)
@@ -35,7 +35,7 @@ async def me(request: Request, user: UserBase = Depends(get_current_user)):
 async def update_avatar_user(
     file: UploadFile = File(),
     user: UserBase = Depends(get_current_user_admin),
-    db: AsyncSession = Depends(get_db),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     Update the avatar of the currently authenticated user.
@@ -43,16 +43,14 @@ async def update_avatar_user(
     Args:
         file (UploadFile): The avatar image file to be uploaded.
         user (UserBase): The currently authenticated admin user, provided via dependency injection.
-        db (AsyncSession): The database session used to update user information.
+        user_service (UserService): The service used to update user information.
 
     Returns:
         UserBase: The updated user with the new avatar URL.
     """
-    upload_service = UploadService(CloudinaryUploadService())
-    avatar_url = upload_service.upload_file(file, user.username)
+    avatar_url = await default_upload_service.upload_file(file, user.username)
 
-    user_service = UserService(db)
     user = await user_service.update_avatar_url(user.email, avatar_url)
-    await update_cached_current_user(user)
+    invalidate_cached_tokens(user.username)
 
     return user
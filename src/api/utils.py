@@ -1,3 +1,5 @@
+import time
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
@@ -10,11 +12,16 @@ from src.exceptions.exceptions import (
 
 router = APIRouter(tags=["utils"])
 
+HEALTHCHECK_CACHE_SECONDS = 1.0
+_last_ok: float = 0.0
+
 
 @router.get("/healthchecker")
 async def healthchecker(db: AsyncSession = Depends(get_db)):
     """
     Check the health status of the database and FastAPI server.
+    A successful database check is reused for one second, so frequent probes
+    do not run `SELECT 1` on every request.
 
     Args:
         db (AsyncSession): The database session used to execute a simple query.
@@ -22,12 +29,17 @@ async def healthchecker(db: AsyncSession = Depends(get_db)):
     Returns:
         dict: A dictionary containing a success message if the database is accessible.
     """
+    global _last_ok
+    if time.monotonic() - _last_ok < HEALTHCHECK_CACHE_SECONDS:
+        return {"message": "Welcome to FastAPI!"}
+
     try:
         result = await db.execute(text("SELECT 1"))
         result = result.scalar_one_or_none()
 
         if result is None:
             raise HTTPInternalDatabaseException("Database is not configured correctly")
+        _last_ok = time.monotonic()
         return {"message": "Welcome to FastAPI!"}
     except Exception as e:
         raise HTTPInternalUnexpectedException(f"Error connecting to the database: {e}")
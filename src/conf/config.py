@@ -1,15 +1,20 @@
-from pydantic import ConfigDict
-from pydantic_settings import BaseSettings
+from functools import lru_cache
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     DB_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 3600
     PORT: int = 8000
     JWT_SECRET: str
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_SECONDS: int = 3600
     CLOUDINARY_NAME: str
-    CLOUDINARY_API_KEY: int
+    CLOUDINARY_API_KEY: str
     CLOUDINARY_API_SECRET: str
     MAIL_USERNAME: str
     MAIL_PASSWORD: str
@@ -23,13 +28,30 @@ class Settings(BaseSettings):
     VALIDATE_CERTS: bool = True
     REDIS_HOST: str
     REDIS_PORT: int
+    REDIS_MAX_CONNECTIONS: int = 64
+    RATE_LIMIT_ENABLED: bool = True
 
-    model_config = ConfigDict(
+    model_config = SettingsConfigDict(
         extra="ignore",
         env_file=".env",
         env_file_encoding="utf-8",
         case_sensitive=True,
     )
 
+    @property
+    def REDIS_URL(self) -> str:
+        return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Build the application settings once and reuse them.
+
+    Returns:
+        Settings: The settings read from the environment and the `.env` file.
+    """
+    return Settings()
+
 
-settings = Settings()
+settings = get_settings()
@@ -1,4 +1,5 @@
 import contextlib
+from sqlalchemy.engine import URL, make_url
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -9,11 +10,38 @@ from sqlalchemy.ext.asyncio import (
 from src.conf.config import settings
 
 
+def get_async_url(url: str) -> URL:
+    """
+    Make sure a PostgreSQL URL uses the asyncpg driver.
+
+    Args:
+        url (str): The database URL from the settings.
+
+    Returns:
+        URL: The URL with the `postgresql+asyncpg` driver for PostgreSQL, otherwise unchanged.
+    """
+    db_url = make_url(url)
+    if db_url.get_backend_name() == "postgresql":
+        db_url = db_url.set(drivername="postgresql+asyncpg")
+    return db_url
+
+
 class DatabaseSessionManager:
     def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
+        self._engine: AsyncEngine | None = create_async_engine(
+            get_async_url(url),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+            echo=False,
+        )
         self._session_maker: async_sessionmaker = async_sessionmaker(
-            autoflush=False, autocommit=False, bind=self._engine
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+            bind=self._engine,
         )
 
     @contextlib.asynccontextmanager
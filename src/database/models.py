@@ -1,8 +1,25 @@
 from enum import Enum
-from sqlalchemy import Integer, String, Date, ForeignKey, Boolean, Enum as SqlEnum
-from sqlalchemy.orm import DeclarativeBase, relationship, mapped_column, Mapped
+from sqlalchemy import (
+    Integer,
+    String,
+    Date,
+    ForeignKey,
+    Boolean,
+    Enum as SqlEnum,
+    Index,
+    extract,
+    func,
+    literal_column,
+    text,
+)
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    relationship,
+    mapped_column,
+    Mapped,
+)
 from sqlalchemy.sql.sqltypes import DateTime, Date
-from datetime import datetime
+from datetime import date, datetime
 
 
 class UserRole(str, Enum):
@@ -16,17 +33,48 @@ class Base(DeclarativeBase):
 
 class Contact(Base):
     __tablename__ = "contacts"
+    __table_args__ = (
+        Index(
+            "ix_contacts_search_trgm",
+            text("(first_name || ' ' || last_name || ' ' || email) gin_trgm_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index("ix_contacts_user_last_name_id", "user_id", "last_name", "id"),
+        Index("ix_contacts_user_id_email", "user_id", "email", unique=True),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     first_name: Mapped[str] = mapped_column(String(100), nullable=False)
     last_name: Mapped[str] = mapped_column(String(100), nullable=False)
     email: Mapped[str] = mapped_column(String(180), nullable=False)
     phone: Mapped[str] = mapped_column(String(80), nullable=False)
-    birthday: Mapped[str] = mapped_column(String(10), nullable=False)
+    birthday: Mapped[date] = mapped_column(Date, nullable=False)
     user_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), default=None
     )
-    user = relationship("User", backref="contacts")
+    user = relationship("User", lazy="raise")
+
+    @classmethod
+    def search_text(cls):
+        """
+        The searchable text of a contact, matching the `ix_contacts_search_trgm` index expression.
+        """
+        separator = literal_column("' '")
+        return cls.first_name + separator + cls.last_name + separator + cls.email
+
+    @classmethod
+    def birthday_mmdd(cls):
+        """
+        The birthday month and day as a single MMDD integer, matching the `ix_contacts_user_birthday_mmdd` index expression.
+        """
+        return extract("month", cls.birthday) * literal_column("100") + extract(
+            "day", cls.birthday
+        )
+
+
+Index(
+    "ix_contacts_user_birthday_mmdd", Contact.user_id, Contact.birthday_mmdd()
+).ddl_if(dialect="postgresql")
 
 
 class User(Base):
@@ -35,7 +83,7 @@ class User(Base):
     username: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     email: Mapped[str] = mapped_column(String, unique=True, nullable=False)
     password: Mapped[str] = mapped_column(String, nullable=False)
-    created_at: Mapped[DateTime] = mapped_column(DateTime, default=datetime.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
     avatar: Mapped[str] = mapped_column(String(255), nullable=True)
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=True)
     role: Mapped[SqlEnum] = mapped_column(
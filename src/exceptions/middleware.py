@@ -0,0 +1,47 @@
+import logging
+
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.exceptions.exceptions import HTTPInternalUnexpectedException
+
+logger = logging.getLogger(__name__)
+
+
+class UnexpectedExceptionMiddleware:
+    """
+    ASGI middleware turning uncaught exceptions into a JSON 500 response.
+
+    `HTTPException` and registered handlers run inside FastAPI's exception
+    middleware, so only errors nobody handled reach this layer. The traceback
+    is logged before the response is built. Register it before
+    `CORSMiddleware`, so the 500 responses still carry CORS headers.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as exc:
+            logger.exception("Unhandled error on %s %s", scope["method"], scope["path"])
+            if response_started:
+                raise
+            error = HTTPInternalUnexpectedException(str(exc))
+            response = ORJSONResponse(
+                status_code=error.status_code, content={"detail": error.detail}
+            )
+            await response(scope, receive, send)
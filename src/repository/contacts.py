@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
-from sqlalchemy import select
+from sqlalchemy import Select, select, delete, update, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.sql.expression import or_, and_, func
+from sqlalchemy.sql.expression import or_, func
 
 from src.database.models import Contact
 from src.schemas.contacts import ContactBase, ContactUpdate
@@ -21,59 +21,127 @@ class ContactsRepository:
         search: str | None = None,
         skip: int | None = None,
         limit: int | None = None,
+        cursor: tuple[str, int] | None = None,
     ):
         """
         Retrieve all Contacts, with optional filters for search, birthdays, and pagination.
 
+        Contacts are ordered by last name and ID. Passing the `(last_name, id)` of the
+        last Contact of a page as `cursor` seeks straight to the next page through the
+        `ix_contacts_user_last_name_id` index instead of skipping rows with OFFSET.
+
         Args:
             birthdays_within_days (int, optional): The number of upcoming days to filter contacts with birthdays.
             search (str, optional): A search term to filter contacts by first name, last name, or email.
             skip (int, optional): The number of records to skip for pagination.
             limit (int, optional): The maximum number of records to retrieve.
+            cursor (tuple[str, int], optional): The last name and ID of the Contact to continue after.
 
         Returns:
             list: A list of Contacts matching the filter criteria.
         """
-        stmt = select(Contact)
+        stmt = self._paginate(
+            self._filter(select(Contact), birthdays_within_days, search),
+            skip,
+            limit,
+            cursor,
+        )
 
-        if search is not None:
-            stmt = stmt.filter(
-                or_(
-                    Contact.first_name.ilike(f"%{search}%"),
-                    Contact.last_name.ilike(f"%{search}%"),
-                    Contact.email.ilike(f"%{search}%"),
-                )
+        result = await self.db.scalars(stmt)
+        return result.all()
+
+    async def get_all_with_total(
+        self,
+        birthdays_within_days: int | None = None,
+        search: str | None = None,
+        skip: int | None = None,
+        limit: int | None = None,
+    ) -> tuple[list[Contact], int]:
+        """
+        Retrieve a page of Contacts together with the total number of matching Contacts.
+
+        The total is read from a `count(*) OVER ()` window in the same query, so no
+        separate COUNT round trip is needed unless the page is past the last row.
+
+        Args:
+            birthdays_within_days (int, optional): The number of upcoming days to filter contacts with birthdays.
+            search (str, optional): A search term to filter contacts by first name, last name, or email.
+            skip (int, optional): The number of records to skip for pagination.
+            limit (int, optional): The maximum number of records to retrieve.
+
+        Returns:
+            tuple[list[Contact], int]: The Contacts of the page and the total number of matches.
+        """
+        stmt = self._filter(
+            select(Contact, func.count().over().label("total")),
+            birthdays_within_days,
+            search,
+        )
+        stmt = self._paginate(stmt, skip, limit)
+
+        rows = (await self.db.execute(stmt)).all()
+        if rows:
+            return [row.Contact for row in rows], rows[0].total
+
+        if not skip:
+            return [], 0
+
+        total = await self.db.scalar(
+            self._filter(
+                select(func.count()).select_from(Contact),
+                birthdays_within_days,
+                search,
             )
+        )
+        return [], total
+
+    def _paginate(
+        self,
+        stmt: Select,
+        skip: int | None = None,
+        limit: int | None = None,
+        cursor: tuple[str, int] | None = None,
+    ) -> Select:
+        stmt = stmt.order_by(Contact.last_name, Contact.id)
+
+        if cursor is not None:
+            stmt = stmt.filter(tuple_(Contact.last_name, Contact.id) > tuple_(*cursor))
+        if skip is not None:
+            stmt = stmt.offset(skip)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        return stmt
+
+    def _filter(
+        self,
+        stmt: Select,
+        birthdays_within_days: int | None = None,
+        search: str | None = None,
+    ) -> Select:
+        if search is not None:
+            stmt = stmt.filter(Contact.search_text().ilike(f"%{search}%"))
 
         if birthdays_within_days is not None:
             today = datetime.now().date()
             week = today + timedelta(days=birthdays_within_days)
 
-            today_mmdd = today.strftime("%m-%d")
-            week_mmdd = week.strftime("%m-%d")
+            today_mmdd = today.month * 100 + today.day
+            week_mmdd = week.month * 100 + week.day
 
             if today_mmdd <= week_mmdd:
                 stmt = stmt.filter(
-                    func.to_char(Contact.birthday, "MM-DD").between(
-                        today_mmdd, week_mmdd
-                    )
+                    Contact.birthday_mmdd().between(today_mmdd, week_mmdd)
                 )
             else:
                 stmt = stmt.filter(
                     or_(
-                        func.to_char(Contact.birthday, "MM-DD") >= today_mmdd,
-                        func.to_char(Contact.birthday, "MM-DD") <= week_mmdd,
+                        Contact.birthday_mmdd() >= today_mmdd,
+                        Contact.birthday_mmdd() <= week_mmdd,
                     )
                 )
 
-        if skip is not None:
-            stmt = stmt.offset(skip)
-        if limit is not None:
-            stmt = stmt.limit(limit)
-
-        stmt = stmt.filter(and_(Contact.user == self.current_user))
-        result = await self.db.execute(stmt)
-        return result.scalars().all()
+        return stmt.filter(Contact.user_id == self.current_user.id)
 
     async def get_contact_by_email(
         self,
@@ -88,13 +156,11 @@ class ContactsRepository:
         Returns:
             Contact | None: The contact associated with the provided email for the current user, or None if no such contact exists.
         """
-        return (
-            await self.db.execute(
-                select(Contact).filter(
-                    and_(Contact.email == email, Contact.user == self.current_user)
-                )
+        return await self.db.scalar(
+            select(Contact).filter(
+                Contact.email == email, Contact.user_id == self.current_user.id
             )
-        ).scalar_one_or_none()
+        )
 
     async def get_contact_by_id(
         self,
@@ -109,13 +175,11 @@ class ContactsRepository:
         Returns:
             Contact | None: The Contact associated with the provided ID for the current user, or None if no such contact exists.
         """
-        return (
-            await self.db.execute(
-                select(Contact).filter(
-                    and_(Contact.id == contact_id, Contact.user == self.current_user)
-                )
+        return await self.db.scalar(
+            select(Contact).filter(
+                Contact.id == contact_id, Contact.user_id == self.current_user.id
             )
-        ).scalar_one_or_none()
+        )
 
     async def create(self, body: ContactBase):
         """
@@ -142,33 +206,37 @@ class ContactsRepository:
             body (ContactUpdate): The data containing the updated values for the contact.
 
         Returns:
-            Contact: The updated Contact with its new details.
+            Contact | None: The updated Contact with its new details, or None if no contact matched.
         """
-        contact = await self.get_contact_by_id(contact_id)
-
-        if contact:
-            for key, value in body.model_dump(exclude_unset=True).items():
-                setattr(contact, key, value)
-
-            await self.db.commit()
-            await self.db.refresh(contact)
-            return contact
+        values = body.model_dump(exclude_unset=True)
+        if not values:
+            return await self.get_contact_by_id(contact_id)
+
+        result = await self.db.execute(
+            update(Contact)
+            .where(Contact.id == contact_id, Contact.user_id == self.current_user.id)
+            .values(**values)
+            .returning(Contact)
+            .execution_options(populate_existing=True)
+        )
+        contact = result.scalar_one_or_none()
+        await self.db.commit()
+        return contact
 
-    async def delete(self, contact_id: int):
+    async def delete_returning(self, contact_id: int) -> int | None:
         """
-        Delete a contact by its ID.
+        Delete a contact by its ID with a single `DELETE ... RETURNING` statement.
 
         Args:
             contact_id (int): The ID of the contact to be deleted.
 
         Returns:
-            Contact: The deleted contact.
-            If the contact does not exist, this method will return `None`, and it is expected
-            that the caller will handle the case where the contact does not exist.
+            int | None: The ID of the deleted contact, or None if no contact matched.
         """
-        contact = await self.get_contact_by_id(contact_id)
-
-        if contact:
-            await self.db.delete(contact)
-            await self.db.commit()
-            return contact
+        result = await self.db.execute(
+            delete(Contact)
+            .where(Contact.id == contact_id, Contact.user_id == self.current_user.id)
+            .returning(Contact.id)
+        )
+        await self.db.commit()
+        return result.scalar_one_or_none()
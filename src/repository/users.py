@@ -1,5 +1,5 @@
-from typing import Optional
-from sqlalchemy import select
+from typing import Optional, Sequence
+from sqlalchemy import Row, select, or_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import User
@@ -20,8 +20,7 @@ class UserRepository:
         Returns:
             User | None: The User object if found, otherwise None.
         """
-        user = await self.db.execute(select(User).filter(User.id == user_id))
-        return user.scalar_one_or_none()
+        return await self.db.scalar(select(User).filter(User.id == user_id))
 
     async def get_user_by_username(self, username: str) -> User | None:
         """
@@ -33,8 +32,7 @@ class UserRepository:
         Returns:
             User | None: The User object if found, otherwise None.
         """
-        user = await self.db.execute(select(User).filter(User.username == username))
-        return user.scalar_one_or_none()
+        return await self.db.scalar(select(User).filter(User.username == username))
 
     async def get_user_by_email(self, email: str) -> User | None:
         """
@@ -46,8 +44,27 @@ class UserRepository:
         Returns:
             User | None: The User object if found, otherwise None.
         """
-        user = await self.db.execute(select(User).filter(User.email == email))
-        return user.scalar_one_or_none()
+        return await self.db.scalar(select(User).filter(User.email == email))
+
+    async def get_users_by_email_or_username(
+        self, email: str, username: str
+    ) -> Sequence[Row]:
+        """
+        Get the email and username of every User matching either value in one query.
+
+        Args:
+            email (str): The email to look for.
+            username (str): The username to look for.
+
+        Returns:
+            Sequence[Row]: Rows with `email` and `username` columns of the matching Users.
+        """
+        result = await self.db.execute(
+            select(User.email, User.username).filter(
+                or_(User.email == email, User.username == username)
+            )
+        )
+        return result.all()
 
     async def create_user(self, body: UserCreate, avatar: Optional[str] = None) -> User:
         """
@@ -78,15 +95,9 @@ class UserRepository:
             User | None: The updated user object if the user exists and the avatar URL is updated,
             or None if the user does not exist.
         """
-        user = await self.get_user_by_email(email)
-
-        if user:
-            setattr(user, "avatar", url)
-            await self.db.commit()
-            await self.db.refresh(user)
-            return user
+        return await self._update_by_email(email, avatar=url)
 
-    async def verify_email(self, email: str) -> None:
+    async def verify_email(self, email: str) -> User | None:
         """
         Verify the email of a user by updating the `confirmed` field to `True`.
 
@@ -94,13 +105,31 @@ class UserRepository:
             email (str): The email of the user to be verified.
 
         Returns:
-            None
+            User | None: The verified user, or None if the user does not exist.
         """
-        user = await self.get_user_by_email(email)
+        return await self._update_by_email(email, confirmed=True)
 
-        if user:
-            setattr(user, "confirmed", True)
-            await self.db.commit()
+    async def _update_by_email(self, email: str, **values) -> User | None:
+        """
+        Update a user identified by their email with a single `UPDATE ... RETURNING` statement.
+
+        Args:
+            email (str): The email of the user to be updated.
+            **values: The column values to set.
+
+        Returns:
+            User | None: The updated user, or None if the user does not exist.
+        """
+        result = await self.db.execute(
+            update(User)
+            .where(User.email == email)
+            .values(**values)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one_or_none()
+        await self.db.commit()
+        return user
 
     async def update_user(self, user: User, body: UserUpdate) -> bool:
         """
@@ -1,13 +1,5 @@
 from datetime import date
-from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_validator
-from src.exceptions.exceptions import HTTPBadRequestException
-
-
-def validate_birthday(birthday: str):
-    try:
-        date.fromisoformat(birthday)
-    except ValueError:
-        raise HTTPBadRequestException("Invalid date format. Should be YYYY-MM-DD.")
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, TypeAdapter
 
 
 class ContactBase(BaseModel):
@@ -15,14 +7,7 @@ class ContactBase(BaseModel):
     last_name: str = Field(min_length=1, max_length=100)
     email: EmailStr = Field(max_length=200)
     phone: str = Field(min_length=3, max_length=50)
-    birthday: str
-
-    @field_validator("birthday", mode="before")
-    @classmethod
-    def validate_birthday_field(cls, v):
-        if v:
-            validate_birthday(v)
-        return v
+    birthday: date
 
 
 class ContactUpdate(BaseModel):
@@ -30,17 +15,13 @@ class ContactUpdate(BaseModel):
     last_name: str | None = Field(default=None, min_length=1, max_length=100)
     email: EmailStr | None = Field(default=None, max_length=180)
     phone: str | None = Field(default=None, min_length=3, max_length=80)
-    birthday: str | None = None
-
-    @field_validator("birthday", mode="before")
-    @classmethod
-    def validate_birthday_field(cls, v):
-        if v:
-            validate_birthday(v)
-        return v
+    birthday: date | None = None
 
 
 class ContactResponse(ContactBase):
     id: int
 
     model_config = ConfigDict(from_attributes=True)
+
+
+CONTACT_LIST_ADAPTER = TypeAdapter(list[ContactResponse])
@@ -7,7 +7,7 @@ class UserBase(BaseModel):
     id: int
     username: str
     email: EmailStr
-    avatar: str
+    avatar: str | None = None
 
     model_config = ConfigDict(from_attributes=True)
 
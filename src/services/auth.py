@@ -1,40 +1,144 @@
-from datetime import datetime, timedelta, UTC
+import asyncio
+import hashlib
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Optional
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException
 from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.ext.asyncio import AsyncSession
-from jose import JWTError, jwt
+import jwt
 import logging
 
-from src.database.db import get_db
 from src.database.models import UserRole, User
 from src.services.cache import get_cached_current_user, update_cached_current_user
-from src.conf.config import settings
-from src.services.users import UserService
+from src.conf.config import Settings, get_settings
+from src.services.users import UserService, get_user_service
 from src.exceptions.exceptions import (
     HTTPUnauthorizedException,
     HTTPBadRequestException,
 )
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
 logger = logging.getLogger(__name__)
 
 
 class Hash:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__time_cost=2,
+        argon2__memory_cost=19 * 1024,
+        argon2__parallelism=1,
+    )
 
     def verify_password(self, plain_password, hashed_password):
+        """
+        Verify a password against its hash.
+
+        The comparison is delegated to passlib, which re-hashes the password
+        and compares digests in constant time.
+
+        Args:
+            plain_password (str): The password provided by the user.
+            hashed_password (str): The stored password hash.
+
+        Returns:
+            bool: True if the password matches the hash, otherwise False.
+        """
         return self.pwd_context.verify(plain_password, hashed_password)
 
     def get_password_hash(self, password: str):
+        """
+        Hash a password with the preferred scheme of the context.
+
+        Args:
+            password (str): The plain password to hash.
+
+        Returns:
+            str: The password hash.
+        """
         return self.pwd_context.hash(password)
 
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """
+        Check whether a stored hash uses a deprecated scheme or outdated parameters.
+
+        Args:
+            hashed_password (str): The stored password hash.
+
+        Returns:
+            bool: True if the password should be hashed again with the preferred scheme.
+        """
+        try:
+            return self.pwd_context.needs_update(hashed_password)
+        except ValueError:
+            return False
+
+
+hasher = Hash()
+
+_password_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password against its hash without blocking the event loop.
+
+    Args:
+        plain_password (str): The password provided by the user.
+        hashed_password (str): The stored password hash.
+
+    Returns:
+        bool: True if the password matches the hash, otherwise False.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, hasher.verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash(password: str) -> str:
+    """
+    Hash a password without blocking the event loop.
+
+    Args:
+        password (str): The plain password to hash.
+
+    Returns:
+        str: The password hash.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, hasher.get_password_hash, password
+    )
+
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+
+
+def _token_cache_key(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+def invalidate_cached_tokens(username: str) -> None:
+    """
+    Drop every cached token entry that resolves to the given user.
+
+    Args:
+        username (str): The username whose cached token entries should be removed.
+
+    Returns:
+        None
+    """
+    for key, (user, _) in list(_token_cache.items()):
+        if user.username == username:
+            _token_cache.pop(key, None)
+
 
 async def create_access_token(payload: dict, expires_delta: Optional[int] = None):
     """
@@ -48,20 +152,18 @@ async def create_access_token(payload: dict, expires_delta: Optional[int] = None
     Returns:
         str: The encoded JWT access token.
     """
-    payload_data = payload.copy()
-    if expires_delta:
-        expire = datetime.now(UTC) + timedelta(seconds=expires_delta)
-    else:
-        expire = datetime.now(UTC) + timedelta(
-            seconds=int(settings.JWT_EXPIRATION_SECONDS)
-        )
-    payload_data.update({"exp": expire})
+    settings = get_settings()
+    expires_in = expires_delta or settings.JWT_EXPIRATION_SECONDS
+    payload_data = {**payload, "exp": int(time.time()) + expires_in}
     encoded = jwt.encode(
         payload_data, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
     )
     return encoded
 
 
+EMAIL_TOKEN_EXPIRATION_SECONDS = 7 * 24 * 60 * 60
+
+
 def create_token(payload: dict):
     """
     Create a JWT token with a 7-day expiration.
@@ -73,53 +175,120 @@ def create_token(payload: dict):
     Returns:
         str: A JWT token as a string.
     """
-    to_encode = payload.copy()
-    expire = datetime.now(UTC) + timedelta(days=7)
-    to_encode.update({"iat": datetime.now(UTC), "exp": expire})
+    settings = get_settings()
+    now = int(time.time())
+    to_encode = {**payload, "iat": now, "exp": now + EMAIL_TOKEN_EXPIRATION_SECONDS}
     token = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return token
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+    token: str = Depends(oauth2_scheme),
+    user_service: UserService = Depends(get_user_service),
+    app_settings: Settings = Depends(get_settings),
 ):
     """
     Retrieve the currently authenticated user from the JWT token.
 
     Args:
         token (str): A JWT token automatically extracted from the Authorization header by FastAPI's `oauth2_scheme`.
-        db (AsyncSession): SQLAlchemy asynchronous database session (injected via dependency).
+        user_service (UserService): The user service of the current request (injected via dependency).
+        app_settings (Settings): The settings holding the JWT secret and algorithm (injected via dependency).
 
     Returns:
         User: The user object corresponding to the username in the token payload.
     """
     credentials_exception = HTTPUnauthorizedException("Could not validate credentials")
 
+    token_key = _token_cache_key(token)
+    cached_token = _token_cache.get(token_key)
+    if cached_token is not None:
+        token_user, expires_at = cached_token
+        if expires_at is None or expires_at > time.time():
+            return token_user
+        _token_cache.pop(token_key, None)
+
     try:
         payload = jwt.decode(
-            token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+            token,
+            app_settings.JWT_SECRET,
+            algorithms=[app_settings.JWT_ALGORITHM],
+            options={"require": ["exp", "sub"]},
         )
         username = payload["sub"]
         if username is None:
             raise credentials_exception
-    except JWTError:
+    except jwt.PyJWTError:
         raise credentials_exception
 
+    expires_at = payload.get("exp")
+
     cached_user = await get_cached_current_user(username)
     if cached_user:
-        logger.info(f'Get user data from cache - "{cached_user.username}".')
+        logger.info('Get user data from cache - "%s".', cached_user.username)
+        _token_cache[token_key] = (cached_user, expires_at)
         return cached_user
 
-    logger.info(f'Search for user data "{username}" in db.')
-    user_service = UserService(db)
+    logger.info('Search for user data "%s" in db.', username)
     user = await user_service.get_user_by_username(username)
     if user is None:
         raise credentials_exception
 
     await update_cached_current_user(user)
+    _token_cache[token_key] = (user, expires_at)
     return user
 
 
+@dataclass(frozen=True, slots=True)
+class TokenUser:
+    """
+    The user identity carried by an access token, enough for queries scoped by `user_id`.
+    """
+
+    id: int
+
+
+async def get_current_user_id(
+    token: str = Depends(oauth2_scheme),
+    user_service: UserService = Depends(get_user_service),
+    app_settings: Settings = Depends(get_settings),
+) -> TokenUser:
+    """
+    Resolve the authenticated user's ID from the `uid` claim without touching Redis or the database.
+
+    Tokens issued before the claim existed fall back to `get_current_user`.
+
+    Args:
+        token (str): A JWT token automatically extracted from the Authorization header by FastAPI's `oauth2_scheme`.
+        user_service (UserService): The user service of the current request, used only by the fallback.
+        app_settings (Settings): The settings holding the JWT secret and algorithm (injected via dependency).
+
+    Returns:
+        TokenUser: The ID of the user the token was issued to.
+    """
+    cached_token = _token_cache.get(_token_cache_key(token))
+    if cached_token is not None:
+        token_user, expires_at = cached_token
+        if expires_at is None or expires_at > time.time():
+            return TokenUser(id=token_user.id)
+
+    try:
+        payload = jwt.decode(
+            token,
+            app_settings.JWT_SECRET,
+            algorithms=[app_settings.JWT_ALGORITHM],
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError:
+        raise HTTPUnauthorizedException("Could not validate credentials")
+
+    if isinstance(payload.get("uid"), int):
+        return TokenUser(id=payload["uid"])
+
+    user = await get_current_user(token, user_service, app_settings)
+    return TokenUser(id=user.id)
+
+
 def get_current_user_admin(current_user: User = Depends(get_current_user)):
     """
     Dependency that ensures the current user has admin privileges.
@@ -145,11 +314,15 @@ async def get_email_from_token(token: str):
     Returns:
         str: The email extracted from the token's "sub" claim.
     """
+    settings = get_settings()
     try:
         payload = jwt.decode(
-            token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
+            token,
+            settings.JWT_SECRET,
+            algorithms=[settings.JWT_ALGORITHM],
+            options={"require": ["exp", "sub"]},
         )
         email = payload["sub"]
         return email
-    except JWTError:
+    except jwt.PyJWTError:
         raise HTTPBadRequestException("Invalid or expired token")
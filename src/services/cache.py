@@ -1,21 +1,234 @@
-import json
+import asyncio
+import functools
+import logging
+import time
 
-from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import Enum
+from operator import attrgetter
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
 
+import orjson
 import redis.asyncio as redis
+from redis.asyncio.client import Pipeline
 
-from src.database.models import User
+from cachetools import TTLCache
+
+from src.database.models import User, UserRole
 from src.conf.config import settings
 
 
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST, port=settings.REDIS_PORT, decode_responses=True
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REDIS_ERRORS = (redis.RedisError, OSError)
+
+redis_pool = redis.BlockingConnectionPool(
+    host=settings.REDIS_HOST,
+    port=settings.REDIS_PORT,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+    decode_responses=True,
+    socket_keepalive=True,
+    health_check_interval=30,
 )
+redis_client = redis.Redis(connection_pool=redis_pool)
+
+CURRENT_USER_TTL = 60
+CURRENT_USER_KEY_PREFIX = b"user:cur:"
+USER_LOOKUP_TTL = 60
+USER_EMAIL_KEY_PREFIX = "user:lookup:email:"
+USER_NAME_KEY_PREFIX = "user:lookup:name:"
+USER_INVALIDATION_CHANNEL = "user:invalidate"
+
+_local_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=10)
+
+CURRENT_USER_FIELDS = ("id", "username", "email", "role", "avatar", "confirmed")
+_current_user_values = attrgetter(*CURRENT_USER_FIELDS)
+
+
+@dataclass(frozen=True, slots=True)
+class CachedUser:
+    """
+    The current user as stored in the cache, without ORM instrumentation.
+    """
+
+    id: int
+    username: str
+    email: str
+    role: UserRole
+    avatar: Optional[str]
+    confirmed: bool
+
+
+class CircuitBreaker:
+    """
+    Stops calling Redis for a while after repeated failures, so requests fall back to the database.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        window: float = 10.0,
+        reset_timeout: float = 30.0,
+    ):
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._first_failure_at = 0.0
+        self._open_until = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether Redis calls are currently being skipped.
+
+        Returns:
+            bool: True until `reset_timeout` seconds have passed since the breaker tripped.
+        """
+        return time.monotonic() < self._open_until
+
+    def record_success(self) -> None:
+        """
+        Forgets earlier failures after a successful Redis call.
+
+        Returns:
+            None
+        """
+        self._failures = 0
+
+    def record_failure(self) -> None:
+        """
+        Counts a failed Redis call and trips the breaker once `failure_threshold` fail within `window` seconds.
+
+        Returns:
+            None
+        """
+        now = time.monotonic()
+        if self._failures == 0 or now - self._first_failure_at > self.window:
+            self._failures = 0
+            self._first_failure_at = now
+
+        self._failures += 1
+        if self._failures >= self.failure_threshold:
+            self._failures = 0
+            self._open_until = now + self.reset_timeout
+
+    async def call(self, operation: Callable[[], Awaitable[T]], default: T = None) -> T:
+        """
+        Runs a Redis operation unless the breaker is open.
+
+        A Redis error is logged and counted instead of being raised, so callers
+        carry on as on a cache miss.
+
+        Args:
+            operation (Callable[[], Awaitable[T]]): Starts the Redis call when invoked.
+            default (T): The value returned when the call is skipped or fails.
+
+        Returns:
+            T: The result of the operation, or `default`.
+        """
+        if self.is_open:
+            return default
+
+        try:
+            result = await operation()
+        except REDIS_ERRORS as e:
+            logger.warning("Redis call failed: %s", e)
+            self.record_failure()
+            return default
+
+        self.record_success()
+        return result
+
+
+redis_breaker = CircuitBreaker()
+
+
+class RedisHashBatcher:
+    """
+    Coalesces HGETALLs issued within a short window into a single pipelined round trip.
+
+    The round trip goes through `redis_breaker`, so a failed or skipped one
+    counts once and reads as empty hashes for every waiting caller.
+    """
+
+    def __init__(self, delay: float = 0.001):
+        self.delay = delay
+        self._pending: dict[bytes, list[asyncio.Future]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get(self, key: bytes) -> dict[str, str]:
+        """
+        Queue a hash key for the next pipelined HGETALL and wait for its fields.
+
+        Args:
+            key (bytes): The Redis key to read.
+
+        Returns:
+            dict[str, str]: The stored fields, empty if the key does not exist.
+        """
+        loop = asyncio.get_running_loop()
+        if self._flush_task is None or self._flush_task.get_loop() is not loop:
+            self._pending = {}
+            self._flush_task = loop.create_task(self._flush())
+
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        return await future
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.delay)
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+
+        keys = list(pending)
+        try:
+            pipe = redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.hgetall(key)
+            values = await redis_breaker.call(pipe.execute)
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        if values is None:
+            values = [{} for _ in keys]
+
+        for key, value in zip(keys, values):
+            for future in pending[key]:
+                if not future.done():
+                    future.set_result(value)
+
+
+current_user_batcher = RedisHashBatcher()
+
+
+def _current_user_key(username: str) -> bytes:
+    return CURRENT_USER_KEY_PREFIX + username.encode()
+
+
+def _encode_user_fields(**fields) -> dict[str, str]:
+    encoded = {}
+    for name, value in fields.items():
+        if value is None:
+            continue
+        if isinstance(value, Enum):
+            value = value.value
+        elif isinstance(value, bool):
+            value = int(value)
+        encoded[name] = str(value)
+    return encoded
 
 
 async def update_cached_current_user(user: User) -> None:
     """
-    Caches the current user's data in Redis.
+    Caches the current user's data in Redis as a hash, through `redis_breaker`.
 
     Args:
         user (User): The user object containing user data to cache.
@@ -23,43 +236,233 @@ async def update_cached_current_user(user: User) -> None:
     Returns:
         None
     """
-    user_data = {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatar": user.avatar,
-        "confirmed": user.confirmed,
-    }
+    _local_user_cache.pop(user.username, None)
+    key = _current_user_key(user.username)
+    user_data = _encode_user_fields(
+        **dict(zip(CURRENT_USER_FIELDS, _current_user_values(user)))
+    )
+    pipe = (
+        redis_client.pipeline(transaction=True)
+        .delete(key)
+        .hset(key, mapping=user_data)
+        .expire(key, CURRENT_USER_TTL)
+        .publish(USER_INVALIDATION_CHANNEL, user.username)
+    )
+    await redis_breaker.call(pipe.execute)
 
-    await redis_client.set(f"user:{user.username}", json.dumps(user_data), ex=60)
 
+@asynccontextmanager
+async def batch() -> AsyncIterator[Pipeline]:
+    """
+    Collects the cache writes queued inside the block and sends them in one round trip on exit.
 
-async def get_cached_current_user(username: str) -> Optional[User]:
+    Yields:
+        Pipeline: The pipeline to pass as `pipe` to the cache helpers.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    yield pipe
+    await redis_breaker.call(pipe.execute)
+
+
+async def patch_cached_user(
+    username: str, *, pipe: Optional[Pipeline] = None, **fields
+) -> None:
+    """
+    Updates individual fields of a cached current user without rewriting the whole entry.
+
+    A hash left without an `id` field is treated as a miss by
+    `get_cached_current_user`, so patching an expired entry is harmless.
+
+    Args:
+        username (str): The username used as the Redis cache key.
+        pipe (Optional[Pipeline]): A `batch()` pipeline to queue the commands on instead of sending them.
+        **fields: The fields to overwrite, e.g. `avatar` or `confirmed`.
+
+    Returns:
+        None
+    """
+    key = _current_user_key(username)
+    _local_user_cache.pop(username, None)
+    target = pipe if pipe is not None else redis_client.pipeline(transaction=True)
+    (
+        target.hset(key, mapping=_encode_user_fields(**fields))
+        .expire(key, CURRENT_USER_TTL)
+        .publish(USER_INVALIDATION_CHANNEL, username)
+    )
+    if pipe is None:
+        await redis_breaker.call(target.execute)
+
+
+async def get_cached_current_user(username: str) -> Optional[CachedUser]:
     """
     Retrieves cached user data from Redis based on the provided username.
 
+    Recently read users are served from a per-process cache first. Concurrent
+    Redis lookups are batched into one pipeline by `current_user_batcher`.
+    A Redis error reads as a miss, and repeated ones open `redis_breaker`,
+    after which lookups return None without touching Redis until it resets.
+
     Args:
         username (str): The username used as the Redis cache key.
 
     Returns:
-        Optional[User]: A User object if found and successfully decoded, otherwise None.
+        Optional[CachedUser]: The cached user if found and successfully decoded, otherwise None.
+    """
+    cached_user = _local_user_cache.get(username)
+    if cached_user is not None:
+        return cached_user
+
+    if redis_breaker.is_open:
+        return None
+
+    data = await current_user_batcher.get(_current_user_key(username))
+
+    if not data or "id" not in data:
+        return None
+
+    try:
+        user = CachedUser(
+            id=int(data["id"]),
+            username=data["username"],
+            email=data["email"],
+            role=UserRole(data["role"]),
+            avatar=data.get("avatar"),
+            confirmed=data.get("confirmed") == "1",
+        )
+    except (KeyError, ValueError) as e:
+        logger.warning("Failed to decode user data from cache: %s", e)
+        return None
+
+    _local_user_cache[username] = user
+    return user
+
+
+async def listen_for_user_invalidations() -> None:
+    """
+    Drops per-process cached users whose entries another worker has rewritten.
+
+    Runs until cancelled. If the subscription drops, the failure is counted by
+    `redis_breaker`, the local cache is cleared, since messages may have been
+    missed, and the subscription is re-established.
+
+    Returns:
+        None
+    """
+    while True:
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(USER_INVALIDATION_CHANNEL)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    _local_user_cache.pop(message["data"], None)
+        except REDIS_ERRORS:
+            redis_breaker.record_failure()
+            _local_user_cache.clear()
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+async def cache_user_lookup(user: User) -> None:
+    """
+    Caches a user row, without its password hash, under both lookup keys in one round trip.
+
+    Args:
+        user (User): The user loaded from the database.
+
+    Returns:
+        None
+    """
+    user_data = orjson.dumps(
+        {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+            "role": user.role,
+            "avatar": user.avatar,
+            "confirmed": user.confirmed,
+        }
+    )
+
+    pipe = (
+        redis_client.pipeline(transaction=False)
+        .set(USER_EMAIL_KEY_PREFIX + user.email, user_data, ex=USER_LOOKUP_TTL)
+        .set(USER_NAME_KEY_PREFIX + user.username, user_data, ex=USER_LOOKUP_TTL)
+    )
+    await redis_breaker.call(pipe.execute)
+
+
+async def get_cached_user_lookup(key: str) -> Optional[User]:
+    """
+    Retrieves a cached user row by its lookup key.
+
+    Args:
+        key (str): The full Redis key, e.g. `user:lookup:email:<email>`.
+
+    Returns:
+        Optional[User]: A transient User object if found and decoded, otherwise None.
     """
-    user_data = await redis_client.get(f"user:{username}")
+    user_data = await redis_breaker.call(lambda: redis_client.get(key))
 
     if user_data:
         try:
-            data = json.loads(user_data)
-            return User(
-                id=data.get("id"),
-                username=data.get("username"),
-                email=data.get("email"),
-                role=data.get("role"),
-                avatar=data.get("avatar"),
-                confirmed=data.get("confirmed", False),
-            )
-        except json.JSONDecodeError as e:
-            print(f"Failed to decode user data from cache: {e}")
-            return None
+            return User(**orjson.loads(user_data))
+        except (orjson.JSONDecodeError, TypeError) as e:
+            logger.warning("Failed to decode user data from cache: %s", e)
 
     return None
+
+
+async def invalidate_cached_user_lookup(
+    email: str, username: str, pipe: Optional[Pipeline] = None
+) -> None:
+    """
+    Removes both lookup keys of a user from the cache.
+
+    Args:
+        email (str): The email of the user.
+        username (str): The username of the user.
+        pipe (Optional[Pipeline]): A `batch()` pipeline to queue the command on instead of sending it.
+
+    Returns:
+        None
+    """
+    keys = (USER_EMAIL_KEY_PREFIX + email, USER_NAME_KEY_PREFIX + username)
+    if pipe is not None:
+        pipe.delete(*keys)
+        return
+
+    await redis_breaker.call(lambda: redis_client.delete(*keys))
+
+
+def cached_user_lookup(key_prefix: str):
+    """
+    Decorates a `(self, value)` user getter with a Redis cache-aside layer.
+
+    On a hit the cached row is returned as a transient User. On a miss the
+    wrapped getter is awaited and a found user is written to the cache.
+
+    Args:
+        key_prefix (str): The prefix the looked up value is appended to.
+
+    Returns:
+        Callable: The decorator.
+    """
+
+    def decorator(
+        func: Callable[..., Awaitable[Optional[User]]],
+    ) -> Callable[..., Awaitable[Optional[User]]]:
+        @functools.wraps(func)
+        async def wrapper(self, value: str) -> Optional[User]:
+            cached_user = await get_cached_user_lookup(key_prefix + value)
+            if cached_user is not None:
+                return cached_user
+
+            user = await func(self, value)
+            if user is not None:
+                await cache_user_lookup(user)
+            return user
+
+        return wrapper
+
+    return decorator
@@ -1,9 +1,17 @@
+import base64
+import binascii
+
+import orjson
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.database.models import Contact
+
 from src.repository.contacts import ContactsRepository
 from src.schemas.contacts import ContactBase, ContactUpdate
 from src.schemas.users import UserBase
 from src.exceptions.exceptions import (
+    HTTPBadRequestException,
     HTTPNotFoundException,
     HTTPConflictRequestException,
 )
@@ -23,6 +31,7 @@ class ContactsService:
         birthdays_within_days: int | None = None,
         skip: int | None = None,
         limit: int | None = None,
+        cursor: str | None = None,
     ):
         """
         Retrieves all contacts for the current user, with optional filtering and pagination.
@@ -32,6 +41,7 @@ class ContactsService:
             birthdays_within_days (int | None): If specified, filters contacts with birthdays within the next N days.
             skip (int | None): Number of records to skip for pagination.
             limit (int | None): Maximum number of records to return.
+            cursor (str | None): A cursor from `encode_cursor` to continue after.
 
         Returns:
             List[Contact]: A list of contact objects matching the criteria.
@@ -41,6 +51,33 @@ class ContactsService:
             birthdays_within_days=birthdays_within_days,
             skip=skip,
             limit=limit,
+            cursor=self.decode_cursor(cursor) if cursor is not None else None,
+        )
+
+    async def get_all_with_total(
+        self,
+        search: str | None = None,
+        birthdays_within_days: int | None = None,
+        skip: int | None = None,
+        limit: int | None = None,
+    ):
+        """
+        Retrieves a page of contacts for the current user together with the total number of matches.
+
+        Args:
+            search (str | None): Optional search term to filter by first name, last name, or email.
+            birthdays_within_days (int | None): If specified, filters contacts with birthdays within the next N days.
+            skip (int | None): Number of records to skip for pagination.
+            limit (int | None): Maximum number of records to return.
+
+        Returns:
+            tuple[List[Contact], int]: The contacts of the page and the total number of matching contacts.
+        """
+        return await self.repository.get_all_with_total(
+            search=search,
+            birthdays_within_days=birthdays_within_days,
+            skip=skip,
+            limit=limit,
         )
 
     async def get_by_id(self, contact_id: int):
@@ -64,21 +101,22 @@ class ContactsService:
         """
         Creates a new contact for the current user.
 
+        A duplicate email is rejected by the unique `(user_id, email)` index, so no
+        lookup is needed before the insert.
+
         Args:
             body (ContactBase): The contact data to create.
 
         Returns:
             Contact: The newly created contact.
         """
-        contact = await self.repository.get_contact_by_email(body.email)
-
-        if contact:
+        try:
+            return await self.repository.create(body)
+        except IntegrityError:
             raise HTTPConflictRequestException(
                 "Cannot create contact, email already registered."
             )
 
-        return await self.repository.create(body)
-
     async def update_by_id(self, contact_id: int, body: ContactUpdate):
         """
         Updates an existing contact by ID for the current user.
@@ -90,26 +128,67 @@ class ContactsService:
         Returns:
             Contact: The updated contact.
         """
-        contact = await self.repository.get_contact_by_id(contact_id)
+        try:
+            contact = await self.repository.update(contact_id, body)
+        except IntegrityError:
+            raise HTTPConflictRequestException(
+                "Cannot update contact, email already registered."
+            )
 
-        if not contact:
+        if contact is None:
             raise HTTPNotFoundException("Not found")
 
-        return await self.repository.update(contact_id, body)
+        return contact
 
-    async def delete_by_id(self, contact_id: int):
+    async def delete_by_id_returning(self, contact_id: int) -> int:
         """
-        Deletes an existing contact by ID for the current user.
+        Deletes an existing contact by ID for the current user in one round trip.
 
         Args:
             contact_id (int): The ID of the contact to delete.
 
         Returns:
-            Contact: The deleted contact.
+            int: The ID of the deleted contact.
         """
-        contact = await self.repository.get_contact_by_id(contact_id)
+        deleted_id = await self.repository.delete_returning(contact_id)
 
-        if contact is None:
+        if deleted_id is None:
             raise HTTPNotFoundException("Not found")
 
-        return await self.repository.delete(contact_id)
+        return deleted_id
+
+    @staticmethod
+    def encode_cursor(contact: Contact) -> str:
+        """
+        Encodes the position of a contact as an opaque pagination cursor.
+
+        Args:
+            contact (Contact): The last contact of a page.
+
+        Returns:
+            str: A URL-safe cursor pointing right after the contact.
+        """
+        return base64.urlsafe_b64encode(
+            orjson.dumps([contact.last_name, contact.id])
+        ).decode()
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> tuple[str, int]:
+        """
+        Decodes a pagination cursor produced by `encode_cursor`.
+
+        Args:
+            cursor (str): The cursor to decode.
+
+        Returns:
+            tuple[str, int]: The last name and ID of the contact to continue after.
+        """
+        try:
+            last_name, contact_id = orjson.loads(base64.urlsafe_b64decode(cursor))
+        except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError):
+            raise HTTPBadRequestException("Invalid cursor.")
+
+        if not isinstance(last_name, str) or not isinstance(contact_id, int):
+            raise HTTPBadRequestException("Invalid cursor.")
+
+        return last_name, contact_id
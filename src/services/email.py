@@ -1,13 +1,42 @@
+import logging
+
 from pathlib import Path
 
 from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
+from arq import Retry
 from fastapi_mail.errors import ConnectionErrors
-from pydantic import SecretStr
+from jinja2 import Environment
+from pydantic import PrivateAttr, SecretStr
 
 from src.services.auth import create_token
 from src.conf.config import settings
 
-conf = ConnectionConfig(
+logger = logging.getLogger(__name__)
+
+
+class TemplateCachingConnectionConfig(ConnectionConfig):
+    """
+    Mail settings that build the Jinja environment once, so each template is compiled once.
+    """
+
+    _template_env: Environment | None = PrivateAttr(default=None)
+
+    def template_engine(self) -> Environment:
+        """
+        Returns the shared template environment, building it on first use.
+
+        `FastMail.send_message` calls this on every send, and a fresh
+        environment would recompile the template each time.
+
+        Returns:
+            Environment: The environment loading templates from `TEMPLATE_FOLDER`.
+        """
+        if self._template_env is None:
+            self._template_env = super().template_engine()
+        return self._template_env
+
+
+conf = TemplateCachingConnectionConfig(
     MAIL_USERNAME=settings.MAIL_USERNAME,
     MAIL_PASSWORD=SecretStr(settings.MAIL_PASSWORD),
     MAIL_FROM=settings.MAIL_FROM,
@@ -21,12 +50,15 @@ conf = ConnectionConfig(
     TEMPLATE_FOLDER=Path(__file__).parent / "templates",
 )
 
+fm = FastMail(conf)
+
 
-async def send_email(email: str, username: str, host: str):
+async def send_email_task(ctx: dict, email: str, username: str, host: str):
     """
-    Sends an email to the specified recipient for email verification.
+    Queue worker task sending the verification email, retried on SMTP errors.
 
     Args:
+        ctx (dict): The arq job context.
         email (str): The email address of the recipient.
         username (str): The username of the recipient.
         host (str): The host URL to include in the verification email template.
@@ -44,23 +76,22 @@ async def send_email(email: str, username: str, host: str):
             subtype=MessageType.html,
         )
 
-        fm = FastMail(conf)
         await fm.send_message(message, template_name="verify_email.html")
     except ConnectionErrors as e:
-        print(e)
+        raise Retry(defer=ctx["job_try"] * 10) from e
 
 
-async def send_reset_email(email: str, token: str, host: str):
+async def send_reset_email_task(ctx: dict, email: str, token: str, host: str):
     """
-    Sends a password reset email to the specified recipient.
+    Queue worker task sending the password reset email, retried on SMTP errors.
 
     Args:
+        ctx (dict): The arq job context.
         email (str): The email address of the recipient.
         token (str): The password reset token.
         host (str): The host URL to include in the reset email template.
     """
     try:
-        token = create_token(payload={"sub": email})
         message = MessageSchema(
             subject="Reset Password request",
             recipients=[email],
@@ -71,7 +102,6 @@ async def send_reset_email(email: str, token: str, host: str):
             subtype=MessageType.html,
         )
 
-        fm = FastMail(conf)
         await fm.send_message(message, template_name="reset_password_email.html")
     except ConnectionErrors as e:
-        print(e)
+        raise Retry(defer=ctx["job_try"] * 10) from e
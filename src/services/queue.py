@@ -0,0 +1,56 @@
+from typing import Optional
+
+from arq import create_pool, func
+from arq.connections import ArqRedis, RedisSettings
+
+from src.conf.config import settings
+from src.services.email import send_email_task, send_reset_email_task
+
+redis_settings = RedisSettings(host=settings.REDIS_HOST, port=settings.REDIS_PORT)
+
+_email_queue: Optional[ArqRedis] = None
+
+
+async def get_email_queue() -> ArqRedis:
+    """
+    Returns the arq Redis pool used to enqueue email jobs, creating it on first use.
+
+    Returns:
+        ArqRedis: The shared arq Redis pool.
+    """
+    global _email_queue
+    if _email_queue is None:
+        _email_queue = await create_pool(redis_settings)
+    return _email_queue
+
+
+async def enqueue_email(task: str, *args, job_id: Optional[str] = None) -> None:
+    """
+    Enqueues an email task for the queue worker.
+
+    A job with the same `job_id` is not enqueued again while it is still pending,
+    so repeated requests do not send duplicate emails.
+
+    Args:
+        task (str): The name of the worker task, e.g. "send_email".
+        *args: Positional arguments passed to the task.
+        job_id (Optional[str]): An idempotency key for the job.
+
+    Returns:
+        None
+    """
+    queue = await get_email_queue()
+    await queue.enqueue_job(task, *args, _job_id=job_id)
+
+
+class WorkerSettings:
+    """
+    arq worker configuration, run with `arq src.services.queue.WorkerSettings`.
+    """
+
+    functions = [
+        func(send_email_task, name="send_email", max_tries=5),
+        func(send_reset_email_task, name="send_reset_email", max_tries=5),
+    ]
+    redis_settings = redis_settings
+    keep_result = 0
@@ -0,0 +1,10 @@
+from slowapi import Limiter
+from slowapi.util import get_remote_address
+
+from src.conf.config import settings
+
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.REDIS_URL,
+    enabled=settings.RATE_LIMIT_ENABLED,
+)
@@ -1,3 +1,5 @@
+import asyncio
+
 import cloudinary
 import cloudinary.uploader
 from fastapi import UploadFile
@@ -5,6 +7,8 @@ from abc import ABC, abstractmethod
 
 from src.conf.config import settings
 
+UPLOAD_CHUNK_SIZE = 6_000_000
+
 
 class BasicUploadService(ABC):
     @abstractmethod
@@ -24,6 +28,8 @@ class CloudinaryUploadService(BasicUploadService):
     def upload_file(self, file, username) -> str:
         """
         Uploads a file to Cloudinary and returns a secure URL for the uploaded file.
+        The file is sent in `UPLOAD_CHUNK_SIZE` parts, so large avatars are never
+        read into memory whole.
 
         Args:
             file (UploadFile): The file to be uploaded.
@@ -33,16 +39,35 @@ class CloudinaryUploadService(BasicUploadService):
             str: A secure URL of the uploaded file.
         """
         public_id = f"RestApp/{username}"
-        r = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
+        r = cloudinary.uploader.upload_large(
+            file.file,
+            public_id=public_id,
+            overwrite=True,
+            chunk_size=UPLOAD_CHUNK_SIZE,
+        )
         src_url = cloudinary.CloudinaryImage(public_id).build_url(
             width=250, height=250, crop="fill", version=r.get("version")
         )
         return src_url
 
 
-class UploadService(BasicUploadService):
+class UploadService:
     def __init__(self, service: BasicUploadService):
         self.service = service
 
-    def upload_file(self, file, username) -> str:
-        return self.service.upload_file(file, username)
+    async def upload_file(self, file, username) -> str:
+        """
+        Uploads a file with the wrapped service in a worker thread,
+        so the blocking SDK call does not stall the event loop.
+
+        Args:
+            file (UploadFile): The file to be uploaded.
+            username (str): The username the file belongs to.
+
+        Returns:
+            str: A URL of the uploaded file.
+        """
+        return await asyncio.to_thread(self.service.upload_file, file, username)
+
+
+default_upload_service = UploadService(CloudinaryUploadService())
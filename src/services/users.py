@@ -1,13 +1,28 @@
+import logging
+
+from fastapi import Depends
+from sqlalchemy import inspect
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
+from src.database.db import get_db
 from src.repository.users import UserRepository
 from src.database.models import User
 from src.schemas.users import UserCreate, UserUpdate
+from src.services.cache import (
+    USER_EMAIL_KEY_PREFIX,
+    USER_NAME_KEY_PREFIX,
+    batch,
+    cached_user_lookup,
+    invalidate_cached_user_lookup,
+    patch_cached_user,
+)
 from src.exceptions.exceptions import (
     HTTPNotFoundException,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class UserService:
     def __init__(self, db: AsyncSession):
@@ -28,8 +43,9 @@ class UserService:
             g = Gravatar(body.email)
             avatar = g.get_image()
         except Exception as e:
-            print(e)
+            logger.warning('Failed to build a Gravatar URL for "%s": %s', body.email, e)
 
+        await invalidate_cached_user_lookup(body.email, body.username)
         return await self.repository.create_user(body, avatar)
 
     async def get_user_by_id(self, user_id: int):
@@ -49,9 +65,10 @@ class UserService:
 
         return user
 
+    @cached_user_lookup(USER_NAME_KEY_PREFIX)
     async def get_user_by_username(self, username: str):
         """
-        Fetches a user by their username.
+        Fetches a user by their username, served from the Redis cache when possible.
 
         Args:
             username (str): The username of the user to retrieve.
@@ -63,9 +80,10 @@ class UserService:
         user = await self.repository.get_user_by_username(username)
         return user
 
+    @cached_user_lookup(USER_EMAIL_KEY_PREFIX)
     async def get_user_by_email(self, email: str):
         """
-        Fetches a user by their email address.
+        Fetches a user by their email address, served from the Redis cache when possible.
 
         Args:
             email (str): The email address of the user to retrieve.
@@ -77,6 +95,54 @@ class UserService:
         user = await self.repository.get_user_by_email(email)
         return user
 
+    async def get_user_by_username_uncached(self, username: str):
+        """
+        Fetches a user by their username straight from the database.
+
+        The lookup cache does not hold password hashes, so credential checks use this.
+
+        Args:
+            username (str): The username of the user to retrieve.
+
+        Returns:
+            User | None: The user object corresponding to the provided username,
+            or None if no user with that username is found.
+        """
+        return await self.repository.get_user_by_username(username)
+
+    async def get_user_by_email_uncached(self, email: str):
+        """
+        Fetches a user by their email address straight from the database.
+
+        Used by the password-reset flow, which must not act on a stale cached row.
+
+        Args:
+            email (str): The email address of the user to retrieve.
+
+        Returns:
+            User | None: The user object corresponding to the provided email address,
+                         or None if no user with that email is found.
+        """
+        return await self.repository.get_user_by_email(email)
+
+    async def get_user_by_email_or_username(
+        self, email: str, username: str
+    ) -> tuple[bool, bool]:
+        """
+        Checks with a single query whether an email and a username are already taken.
+
+        Args:
+            email (str): The email address to check.
+            username (str): The username to check.
+
+        Returns:
+            tuple[bool, bool]: Whether the email is taken and whether the username is taken.
+        """
+        rows = await self.repository.get_users_by_email_or_username(email, username)
+        email_taken = any(row.email == email for row in rows)
+        username_taken = any(row.username == username for row in rows)
+        return email_taken, username_taken
+
     async def update_avatar_url(self, email: str, url: str):
         """
         Updates the avatar URL for a user identified by their email address.
@@ -88,12 +154,15 @@ class UserService:
         Returns:
             User: The updated user object with the new avatar URL.
         """
-        user = await self.get_user_by_email(email)
+        user = await self.repository.update_avatar_url(email, url)
 
         if not user:
             raise HTTPNotFoundException("Not found")
 
-        return await self.repository.update_avatar_url(email, url)
+        async with batch() as pipe:
+            await invalidate_cached_user_lookup(email, user.username, pipe=pipe)
+            await patch_cached_user(user.username, pipe=pipe, avatar=user.avatar)
+        return user
 
     async def verify_email(self, email: str):
         """
@@ -105,12 +174,20 @@ class UserService:
         Returns:
             None
         """
-        await self.repository.verify_email(email)
+        user = await self.repository.verify_email(email)
+
+        if user:
+            async with batch() as pipe:
+                await invalidate_cached_user_lookup(email, user.username, pipe=pipe)
+                await patch_cached_user(user.username, pipe=pipe, confirmed=True)
 
     async def update_user(self, user: User, body: UserUpdate):
         """
         Updates a user's information with the provided data.
 
+        A transient user served from the lookup cache is reloaded from the
+        database first, so the changes are tracked by the session.
+
         Args:
             user (User): The existing user to be updated.
             body (UserUpdate): The data to update the user with.
@@ -118,4 +195,23 @@ class UserService:
         Returns:
             bool: Returns `True` if the user was successfully updated.
         """
-        return await self.repository.update_user(user, body)
+        if inspect(user).transient:
+            user = await self.repository.get_user_by_id(user.id)
+
+        email, username = user.email, user.username
+        updated = await self.repository.update_user(user, body)
+        await invalidate_cached_user_lookup(email, username)
+        return updated
+
+
+def get_user_service(db: AsyncSession = Depends(get_db)) -> UserService:
+    """
+    Provide a UserService bound to the request's database session.
+
+    Args:
+        db (AsyncSession): The database session of the current request.
+
+    Returns:
+        UserService: The service instance shared by the request.
+    """
+    return UserService(db)
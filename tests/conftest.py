@@ -1,18 +1,25 @@
 import asyncio
+from io import BytesIO
+from types import SimpleNamespace
 from unittest.mock import MagicMock, AsyncMock, Mock
+import anyio
 import pytest
 import pytest_asyncio
+from fastapi import UploadFile
 from fastapi.testclient import TestClient
 from sqlalchemy.pool import StaticPool
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+import jwt
 import redis.asyncio as redis
 
 from main import app
+from src.conf.config import settings
+from src.services.ratelimit import limiter
 from src.database.models import Base, User
 from src.database.db import get_db
 from src.services.auth import create_access_token, Hash
 
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
 
 engine = create_async_engine(
     SQLALCHEMY_DATABASE_URL,
@@ -24,6 +31,13 @@ TestingSessionLocal = async_sessionmaker(
     autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
 )
 
+
+def pytest_collection_modifyitems(config, items):
+    for item in items:
+        if item.path.name.startswith("test_integration_"):
+            item.add_marker(pytest.mark.integration)
+
+
 test_user = {
     "id": 1,
     "username": "deadpool",
@@ -33,12 +47,22 @@ test_user = {
 }
 
 
-@pytest.fixture(scope="module", autouse=True)
-def init_models_wrap():
-    async def init_models():
+@pytest.fixture(scope="session")
+def create_schema():
+    async def create_all():
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.drop_all)
             await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_all())
+
+
+@pytest.fixture(scope="module", autouse=True)
+def init_models_wrap(create_schema):
+    async def init_models():
+        async with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                await conn.execute(table.delete())
         async with TestingSessionLocal() as session:
             hash_password = Hash().get_password_hash(test_user["password"])
             current_user = User(
@@ -56,23 +80,131 @@ def init_models_wrap():
     asyncio.run(init_models())
 
 
-@pytest.fixture(scope="module")
-def client():
-    async def override_get_db():
-        async with TestingSessionLocal() as session:
-            try:
-                yield session
-            except Exception as err:
-                await session.rollback()
-                raise
+@pytest.fixture
+def mock_session():
+    return SimpleNamespace(
+        add=MagicMock(),
+        commit=AsyncMock(),
+        delete=AsyncMock(),
+        execute=AsyncMock(),
+        refresh=AsyncMock(),
+        scalar=AsyncMock(),
+        scalars=AsyncMock(),
+    )
+
+
+def async_spy():
+    calls = []
+
+    async def spy(*args, **kwargs):
+        calls.append((args, kwargs))
+
+    spy.calls = calls
+    return spy
+
+
+def all_result(rows):
+    return SimpleNamespace(all=lambda: rows)
+
+
+def scalar_one(value):
+    return SimpleNamespace(scalar_one_or_none=lambda: value)
+
+
+def decode_token(token):
+    return jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+
+
+def areturn(value):
+    async def returning(*args, **kwargs):
+        return value
+
+    return returning
+
+
+@pytest.fixture(scope="session")
+def make_upload():
+    def build(name="test.png", data=b"test"):
+        return UploadFile(filename=name, file=BytesIO(data))
+
+    return build
+
+
+@pytest.fixture
+def fast_patch():
+    saved = []
+
+    def swap(target, **attrs):
+        for name, value in attrs.items():
+            saved.append((target, name, getattr(target, name)))
+            setattr(target, name, value)
+
+    yield swap
 
+    for target, name, value in reversed(saved):
+        setattr(target, name, value)
+
+
+STUB_HASH_PREFIX = "$stub$"
+
+
+@pytest.fixture(autouse=True)
+def fast_password_hashing(request, monkeypatch):
+    if request.node.get_closest_marker("real_password_hashing"):
+        return
+
+    real_verify_password = Hash.verify_password
+    real_needs_rehash = Hash.needs_rehash
+
+    def is_stub(hashed):
+        return isinstance(hashed, str) and hashed.startswith(STUB_HASH_PREFIX)
+
+    def verify_password(self, plain_password, hashed_password):
+        if is_stub(hashed_password):
+            return hashed_password == STUB_HASH_PREFIX + plain_password
+        return real_verify_password(self, plain_password, hashed_password)
+
+    def needs_rehash(self, hashed_password):
+        return not is_stub(hashed_password) and real_needs_rehash(self, hashed_password)
+
+    monkeypatch.setattr(
+        Hash, "get_password_hash", lambda self, password: STUB_HASH_PREFIX + password
+    )
+    monkeypatch.setattr(Hash, "verify_password", verify_password)
+    monkeypatch.setattr(Hash, "needs_rehash", needs_rehash)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def disable_rate_limiter():
+    limiter.enabled = False
+    yield
+    limiter.enabled = True
+
+
+async def override_get_db():
+    async with TestingSessionLocal() as session:
+        try:
+            yield session
+        except Exception as err:
+            await session.rollback()
+            raise
+
+
+@pytest.fixture(scope="session")
+def client():
     app.dependency_overrides[get_db] = override_get_db
 
-    yield TestClient(app)
+    test_client = TestClient(app)
+    with anyio.from_thread.start_blocking_portal(**test_client.async_backend) as portal:
+        test_client.portal = portal
+        yield test_client
+        test_client.portal = None
+
+    app.dependency_overrides.pop(get_db, None)
 
 
-@pytest.fixture(scope="module")
-def client_fail_healthchecker():
+@pytest.fixture
+def client_fail_healthchecker(client):
     async def mock_get_db():
         mock_session = MagicMock()
         mock_session.execute = AsyncMock(
@@ -82,16 +214,23 @@ def client_fail_healthchecker():
 
     app.dependency_overrides[get_db] = mock_get_db
 
-    yield TestClient(app)
+    yield client
+
+    app.dependency_overrides[get_db] = override_get_db
 
 
-@pytest_asyncio.fixture()
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def get_token():
     token = await create_access_token(payload={"sub": test_user["username"]})
     return token
 
 
-@pytest_asyncio.fixture()
+@pytest.fixture(scope="session")
+def auth_headers(get_token):
+    return {"Authorization": f"Bearer {get_token}"}
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
 async def get_reset_token():
     token = await create_access_token(payload={"sub": test_user["email"]})
     return token
@@ -104,8 +243,47 @@ def mock_redis_client():
     mock_redis = AsyncMock(spec=redis.Redis)
     mock_redis.get = AsyncMock(return_value=None)
     mock_redis.set = AsyncMock(return_value=True)
+    mock_redis.delete = AsyncMock(return_value=0)
+    mock_redis.mget = AsyncMock(side_effect=lambda keys: [None] * len(keys))
+
+    def make_pipeline(transaction=True):
+        mock_pipeline = MagicMock()
+        queued = []
+        for command in ("set", "hset", "hgetall", "expire", "delete", "publish"):
+            getattr(mock_pipeline, command).side_effect = (
+                lambda *args, _command=command, **kwargs: queued.append(_command)
+                or mock_pipeline
+            )
+        mock_pipeline.execute = AsyncMock(
+            side_effect=lambda: [{} if c == "hgetall" else True for c in queued]
+        )
+        return mock_pipeline
+
+    mock_redis.pipeline = MagicMock(side_effect=make_pipeline)
 
     redis_client.get = mock_redis.get
     redis_client.set = mock_redis.set
+    redis_client.delete = mock_redis.delete
+    redis_client.mget = mock_redis.mget
+    redis_client.pipeline = mock_redis.pipeline
 
     yield mock_redis
+
+
+@pytest.fixture(scope="module", autouse=True)
+def mock_email_queue():
+    import src.services.queue as queue
+
+    mock_queue = AsyncMock()
+    queue._email_queue = mock_queue
+
+    yield mock_queue
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    from src.services.auth import _token_cache
+
+    _token_cache.clear()
+    yield
+    _token_cache.clear()
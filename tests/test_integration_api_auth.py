@@ -1,31 +1,53 @@
-from unittest.mock import Mock, patch, MagicMock, AsyncMock
+import json
+from types import SimpleNamespace
+from urllib.parse import urlencode
+from unittest.mock import DEFAULT, Mock, patch, MagicMock, AsyncMock
 import pytest
+from limits.storage import MemoryStorage
+from limits.strategies import FixedWindowRateLimiter
+from passlib.context import CryptContext
 from sqlalchemy import select
 import pytest_asyncio
 
+from main import app
+from src.api.deps import get_user_service
 from src.database.models import User
-from conftest import TestingSessionLocal, test_user
-from src.services.auth import create_access_token
+from conftest import TestingSessionLocal, decode_token, test_user
+from src.services.auth import Hash, create_access_token
+from src.services.ratelimit import limiter
 
 
-@pytest_asyncio.fixture
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
 async def get_token():
     token = await create_access_token(payload={"sub": "test_email@example.com"})
     return token
 
 
+_MOCK_USER_SERVICE = AsyncMock()
+_MOCK_LOGGER = MagicMock()
+_MOCK_UPDATE_CACHED_USER = AsyncMock()
+
+
 @pytest.fixture
-def mock_dependencies(monkeypatch):
-    mock_user_service_instance = AsyncMock()
-    mock_user_service_class = MagicMock(return_value=mock_user_service_instance)
-    monkeypatch.setattr("src.api.auth.UserService", mock_user_service_class)
-    mock_logger = MagicMock()
+def mock_user_service():
+    _MOCK_USER_SERVICE.reset_mock(return_value=True, side_effect=True)
+    app.dependency_overrides[get_user_service] = lambda: _MOCK_USER_SERVICE
+    yield _MOCK_USER_SERVICE
+    app.dependency_overrides.pop(get_user_service, None)
+
+
+@pytest.fixture
+def mock_dependencies(monkeypatch, mock_user_service):
+    mock_user_service_instance = mock_user_service
+    mock_logger = _MOCK_LOGGER
+    mock_logger.reset_mock(return_value=True, side_effect=True)
     monkeypatch.setattr("src.api.auth.logger", mock_logger)
-    mock_update = AsyncMock()
+    mock_update = _MOCK_UPDATE_CACHED_USER
+    mock_update.reset_mock(return_value=True, side_effect=True)
     monkeypatch.setattr("src.api.auth.update_cached_current_user", mock_update)
 
-    mock_user_service_instance.get_user_by_email.return_value = MagicMock(
-        email="test_email@example.com", confirmed=False
+    mock_user_service_instance.get_user_by_email.return_value = SimpleNamespace(
+        username="test_user", email="test_email@example.com", confirmed=False
     )
 
     return mock_user_service_instance, mock_logger, mock_update
@@ -38,17 +60,49 @@ user_data = {
     "role": "admin",
 }
 
+USER_DATA_JSON = json.dumps(user_data).encode()
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+LOGIN_FORM = urlencode(
+    {"username": user_data["username"], "password": user_data["password"]}
+).encode()
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+@pytest.fixture(autouse=True)
+def stub_user_lookups(request, monkeypatch):
+    if request.node.get_closest_marker("real_db"):
+        return
+    for lookup in (
+        "get_user_by_email",
+        "get_user_by_username",
+        "get_user_by_email_uncached",
+        "get_user_by_username_uncached",
+    ):
+        monkeypatch.setattr(
+            f"src.services.users.UserService.{lookup}", AsyncMock(return_value=None)
+        )
+
 
 @pytest.fixture
 def mock_send_email(monkeypatch):
-    mock_send_email = Mock()
-    monkeypatch.setattr("src.api.auth.send_email", mock_send_email)
+    mock_send_email = AsyncMock()
+    monkeypatch.setattr("src.api.auth.enqueue_email", mock_send_email)
     return mock_send_email
 
 
 def test_register_user_creates_account_successfully(client, mock_send_email):
-    response = client.post("api/auth/register", json=user_data)
+    response = client.post(
+        "api/auth/register", content=USER_DATA_JSON, headers=JSON_HEADERS
+    )
     assert response.status_code == 201, response.text
+    mock_send_email.assert_awaited_once_with(
+        "send_email",
+        user_data["email"],
+        user_data["username"],
+        "http://testserver/",
+        job_id=f"send_email:{user_data['email']}",
+    )
     data = response.json()
     assert data["username"] == user_data["username"]
     assert data["email"] == user_data["email"]
@@ -56,13 +110,12 @@ def test_register_user_creates_account_successfully(client, mock_send_email):
     assert "avatar" in data
 
 
+@pytest.mark.real_db
 def test_login_fails_for_unconfirmed_user(client):
     response = client.post(
         "api/auth/login",
-        data={
-            "username": user_data.get("username"),
-            "password": user_data.get("password"),
-        },
+        content=LOGIN_FORM,
+        headers=FORM_HEADERS,
     )
     data = response.json()
 
@@ -70,7 +123,7 @@ def test_login_fails_for_unconfirmed_user(client):
     assert data["detail"] == "User is not confirmed."
 
 
-@pytest.mark.asyncio
+@pytest.mark.real_db
 async def test_login_user_when_confirmed(client):
     async with TestingSessionLocal() as session:
         current_user = await session.execute(
@@ -85,10 +138,8 @@ async def test_login_user_when_confirmed(client):
 
     response = client.post(
         "api/auth/login",
-        data={
-            "username": user_data.get("username"),
-            "password": user_data.get("password"),
-        },
+        content=LOGIN_FORM,
+        headers=FORM_HEADERS,
     )
     data = response.json()
 
@@ -96,42 +147,44 @@ async def test_login_user_when_confirmed(client):
     assert "access_token" in data
     assert "token_type" in data
     assert isinstance(data["access_token"], str)
-
-
-def test_login_user_wrong_password(client):
-    response = client.post(
-        "api/auth/login",
-        data={"username": user_data.get("username"), "password": "wrongpassword"},
-    )
-    data = response.json()
-
-    assert response.status_code == 401, response.text
-    assert data["detail"] == "Incorrect login or/and password."
-
-
-def test_login_user_wrong_username(client):
-    response = client.post(
-        "api/auth/login",
-        data={"username": "wrongusername", "password": user_data.get("password")},
-    )
+    claims = decode_token(data["access_token"])
+    assert claims["uid"] == current_user.id
+
+
+@pytest.mark.real_db
+@pytest.mark.parametrize(
+    "credentials",
+    [
+        {"username": user_data["username"], "password": "wrongpassword"},
+        {"username": "wrongusername", "password": user_data["password"]},
+    ],
+    ids=["wrong_password", "wrong_username"],
+)
+def test_login_rejects_bad_credentials(client, credentials):
+    response = client.post("api/auth/login", data=credentials)
     data = response.json()
 
     assert response.status_code == 401, response.text
     assert data["detail"] == "Incorrect login or/and password."
 
 
-def test_login_user_missing_username(client):
-    response = client.post(
-        "api/auth/login", data={"password": user_data.get("password")}
-    )
+@pytest.mark.parametrize("missing", ["username", "password"])
+def test_login_requires_field(client, missing):
+    form = {"username": user_data["username"], "password": user_data["password"]}
+    del form[missing]
+    response = client.post("api/auth/login", data=form)
     data = response.json()
 
     assert response.status_code == 400, response.text
-    assert "detail" in data
+    assert isinstance(data["detail"], list)
+    assert len(data["detail"]) == 1
+    assert data["detail"][0]["msg"] == "Field required"
+    assert data["detail"][0]["loc"] == ["body", missing]
+    assert "input" not in data["detail"][0]
 
 
-@pytest.mark.asyncio
-async def test_verify_email(client, get_reset_token):
+@pytest.mark.real_db
+async def test_verify_email_confirms_user_in_db(client, get_reset_token):
     token = get_reset_token
 
     response = client.get(f"api/auth/verify_email/{token}")
@@ -148,17 +201,6 @@ async def test_verify_email(client, get_reset_token):
         assert current_user.confirmed is True
 
 
-@pytest.mark.asyncio
-async def test_verify_email_invalid_token(client):
-    invalid_token = "invalid_token"
-
-    response = client.get(f"api/auth/verify_email/{invalid_token}")
-    data = response.json()
-
-    assert response.status_code == 400, response.text
-    assert data["detail"] == "Invalid or expired token"
-
-
 def test_password_reset_with_nonexistent_email(client):
     non_existent_email = "nonexistent@example.com"
     response = client.post(
@@ -170,101 +212,43 @@ def test_password_reset_with_nonexistent_email(client):
     assert data["detail"] == "Unauthorized"
 
 
-def test_login_missing_username(client):
-    response = client.post(
-        "api/auth/login", data={"password": user_data.get("password")}
-    )
-    data = response.json()
-
-    assert response.status_code == 400, response.text
-    assert "detail" in data
-    assert isinstance(data["detail"], list)
-    assert len(data["detail"]) == 1
-    assert data["detail"][0]["msg"] == "Field required"
-    assert data["detail"][0]["loc"] == ["body", "username"]
-
-
-def test_login_missing_password(client):
-    response = client.post(
-        "api/auth/login", data={"username": user_data.get("username")}
-    )
-    data = response.json()
-
-    assert response.status_code == 400, response.text
-    assert "detail" in data
-    assert isinstance(data["detail"], list)
-    assert len(data["detail"]) == 1
-    assert data["detail"][0]["msg"] == "Field required"
-    assert data["detail"][0]["loc"] == ["body", "password"]
-
-
-def test_register_user_with_existing_username(client):
+def test_register_user_with_existing_username(client, monkeypatch):
     user_with_existing_username = user_data.copy()
     user_with_existing_username["email"] = "anotheremail@example.com"
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_email_or_username",
+        AsyncMock(return_value=(False, True)),
+    )
 
-    with patch(
-        "src.services.users.UserService.get_user_by_email", return_value=None
-    ), patch(
-        "src.services.users.UserService.get_user_by_username"
-    ) as mock_username_check:
-
-        mock_username_check.return_value = User(
-            id=99,
-            username=user_with_existing_username["username"],
-            email="other@example.com",
-            avatar="avatar_url",
-            role="user",
-            confirmed=True,
-        )
-
-        response = client.post("api/auth/register", json=user_with_existing_username)
-        data = response.json()
+    response = client.post("api/auth/register", json=user_with_existing_username)
+    data = response.json()
 
-        assert response.status_code == 409, response.text
-        assert data["detail"] == "Cannot create user, username already exists."
+    assert response.status_code == 409, response.text
+    assert data["detail"] == "Cannot create user, username already exists."
 
 
-def test_register_user_with_existing_email(client):
+def test_register_user_with_existing_email(client, monkeypatch):
     user_with_existing_email = user_data.copy()
     user_with_existing_email["username"] = "new_unique_username"
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_email_or_username",
+        AsyncMock(return_value=(True, False)),
+    )
 
-    with patch(
-        "src.services.users.UserService.get_user_by_email"
-    ) as mock_get_email, patch(
-        "src.services.users.UserService.get_user_by_username", return_value=None
-    ):
-
-        mock_get_email.return_value = User(
-            id=42,
-            username="someuser",
-            email=user_with_existing_email["email"],
-            avatar="someavatar",
-            role="user",
-            confirmed=True,
-        )
-
-        response = client.post("api/auth/register", json=user_with_existing_email)
-        data = response.json()
+    response = client.post("api/auth/register", json=user_with_existing_email)
+    data = response.json()
 
-        assert response.status_code == 409, response.text
-        assert data["detail"] == "Cannot create user, email already in use."
+    assert response.status_code == 409, response.text
+    assert data["detail"] == "Cannot create user, email already in use."
 
 
-def test_register_user_success(client, mock_send_email):
+def test_register_user_success(client, mock_send_email, monkeypatch):
     new_user_data = user_data.copy()
     new_user_data["username"] = "uniqueuser"
     new_user_data["email"] = "unique@example.com"
     new_user_data["avatar"] = "some.png"
-
-    with patch(
-        "src.services.users.UserService.get_user_by_email", return_value=None
-    ), patch(
-        "src.services.users.UserService.get_user_by_username", return_value=None
-    ), patch(
-        "src.services.users.UserService.create_user"
-    ) as mock_create_user:
-
-        mock_create_user.return_value = User(
+    mock_create_user = AsyncMock(
+        return_value=User(
             id=1,
             username=new_user_data["username"],
             email=new_user_data["email"],
@@ -272,61 +256,30 @@ def test_register_user_success(client, mock_send_email):
             role=new_user_data["role"],
             confirmed=False,
         )
+    )
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_email_or_username",
+        AsyncMock(return_value=(False, False)),
+    )
+    monkeypatch.setattr("src.services.users.UserService.create_user", mock_create_user)
 
-        response = client.post("api/auth/register", json=new_user_data)
-        data = response.json()
-
-        assert response.status_code == 201, response.text
-        assert data["username"] == new_user_data["username"]
-        assert data["email"] == new_user_data["email"]
-        assert "avatar" in data
-
-        mock_create_user.assert_called_once()
-
-
-@pytest.mark.asyncio
-async def test_register_user_with_existing_email(client):
-    user_with_existing_email = user_data.copy()
-    user_with_existing_email["username"] = "new_unique_username"
-
-    with patch(
-        "src.services.users.UserService.get_user_by_email"
-    ) as mock_get_email, patch(
-        "src.services.users.UserService.get_user_by_username", return_value=None
-    ):
-
-        mock_get_email.return_value = User(
-            id=42,
-            username="someuser",
-            email=user_with_existing_email["email"],
-            avatar="someavatar",
-            role="user",
-            confirmed=True,
-        )
+    response = client.post("api/auth/register", json=new_user_data)
+    data = response.json()
 
-        response = client.post("api/auth/register", json=user_with_existing_email)
-        data = response.json()
+    assert response.status_code == 201, response.text
+    assert data["username"] == new_user_data["username"]
+    assert data["email"] == new_user_data["email"]
+    assert "avatar" in data
 
-        assert response.status_code == 409, response.text
-        assert data["detail"] == "Cannot create user, email already in use."
+    mock_create_user.assert_called_once()
 
 
-def test_register_user_success_with_logging(client, mock_send_email):
+def test_register_user_success_with_logging(client, mock_send_email, monkeypatch):
     new_user_data = user_data.copy()
     new_user_data["username"] = "uniqueuser"
     new_user_data["email"] = "unique@example.com"
-
-    with patch(
-        "src.services.users.UserService.get_user_by_email", return_value=None
-    ), patch(
-        "src.services.users.UserService.get_user_by_username", return_value=None
-    ), patch(
-        "src.services.users.UserService.create_user"
-    ) as mock_create_user, patch(
-        "src.api.auth.logger"
-    ) as mock_logger:
-
-        mock_create_user.return_value = User(
+    mock_create_user = AsyncMock(
+        return_value=User(
             id=1,
             username=new_user_data["username"],
             email=new_user_data["email"],
@@ -334,144 +287,154 @@ def test_register_user_success_with_logging(client, mock_send_email):
             role=new_user_data["role"],
             confirmed=False,
         )
+    )
+    mock_logger = MagicMock()
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_email_or_username",
+        AsyncMock(return_value=(False, False)),
+    )
+    monkeypatch.setattr("src.services.users.UserService.create_user", mock_create_user)
+    monkeypatch.setattr("src.api.auth.logger", mock_logger)
 
-        response = client.post("api/auth/register", json=new_user_data)
-        data = response.json()
+    response = client.post("api/auth/register", json=new_user_data)
+    data = response.json()
 
-        assert response.status_code == 201, response.text
-        assert data["username"] == new_user_data["username"]
-        assert data["email"] == new_user_data["email"]
-        assert "avatar" in data
+    assert response.status_code == 201, response.text
+    assert data["username"] == new_user_data["username"]
+    assert data["email"] == new_user_data["email"]
+    assert "avatar" in data
 
-        mock_logger.info.assert_called_once_with(
-            f'Email sent for "{new_user_data["username"]}".'
-        )
+    mock_logger.info.assert_called_once_with(
+        'Email sent for "%s".', new_user_data["username"]
+    )
 
 
-def test_login_fails_for_incorrect_credentials(client):
+def test_login_fails_for_nonexistent_user(client):
     response = client.post(
         "api/auth/login",
         data={
-            "username": user_data.get("username"),
-            "password": "wrongpassword",
+            "username": "nonexistentuser",
+            "password": "any_password",
         },
     )
     data = response.json()
-
     assert response.status_code == 401, response.text
     assert data["detail"] == "Incorrect login or/and password."
 
 
-@pytest.mark.asyncio
-async def test_login_fails_for_nonexistent_user(client):
-    async with TestingSessionLocal() as session:
-        non_existent_user = await session.execute(
-            select(User).where(User.username == "nonexistentuser")
-        )
-        non_existent_user = non_existent_user.scalar_one_or_none()
-
-        if non_existent_user:
-            pytest.fail(f"Unexpectedly found user with username nonexistentuser")
+def test_login_user(client, get_token, monkeypatch):
+    mock_user = User(
+        id=1,
+        username="deadpool",
+        email="deadpool@example.com",
+        password="hashedpassword",
+        role="admin",
+        confirmed=True,
+    )
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_username_uncached",
+        AsyncMock(return_value=mock_user),
+    )
+    monkeypatch.setattr(
+        "src.services.auth.Hash.verify_password", MagicMock(return_value=True)
+    )
 
     response = client.post(
-        "api/auth/login",
-        data={
-            "username": "nonexistentuser",
-            "password": "any_password",
-        },
+        "api/auth/login", data={"username": "deadpool", "password": "12345678"}
     )
+
+    assert response.status_code == 200
     data = response.json()
-    assert response.status_code == 401, response.text
-    assert data["detail"] == "Incorrect login or/and password."
+    assert "access_token" in data
+    assert data["token_type"] == "bearer"
 
 
-@pytest.mark.asyncio
-async def test_login_user(client, get_token):
-    with patch(
-        "src.services.users.UserService.get_user_by_username"
-    ) as mock_get_user_by_username, patch(
-        "src.services.auth.Hash.verify_password"
-    ) as mock_verify_password:
-        mock_user = User(
-            id=1,
-            username="deadpool",
-            email="deadpool@example.com",
-            password="hashedpassword",
-            role="admin",
-            confirmed=True,
+@pytest.mark.real_db
+@pytest.mark.real_password_hashing
+async def test_login_rehashes_legacy_bcrypt_password(client):
+    legacy_hash = CryptContext(schemes=["bcrypt"]).hash("legacypass")
+    async with TestingSessionLocal() as session:
+        session.add(
+            User(
+                username="legacy",
+                email="legacy@example.com",
+                password=legacy_hash,
+                confirmed=True,
+                role="user",
+            )
         )
-        mock_get_user_by_username.return_value = mock_user
+        await session.commit()
 
-        mock_verify_password.return_value = True
-        response = client.post(
-            "api/auth/login", data={"username": "deadpool", "password": "12345678"}
-        )
+    response = client.post(
+        "api/auth/login", data={"username": "legacy", "password": "legacypass"}
+    )
+    assert response.status_code == 200, response.text
 
-        assert response.status_code == 200
-        data = response.json()
-        assert "access_token" in data
-        assert data["token_type"] == "bearer"
+    async with TestingSessionLocal() as session:
+        user = await session.scalar(select(User).where(User.username == "legacy"))
 
+    assert user.password.startswith("$argon2id$")
+    assert Hash().verify_password("legacypass", user.password)
 
-@pytest.mark.asyncio
-async def test_login_user_invalid_credentials(client):
-    with patch(
-        "src.services.users.UserService.get_user_by_username"
-    ) as mock_get_user_by_username, patch(
-        "src.services.auth.Hash.verify_password"
-    ) as mock_verify_password:
 
-        mock_get_user_by_username.return_value = None
-        response = client.post(
-            "api/auth/login", data={"username": "deadpool", "password": "wrongpassword"}
-        )
+def test_login_user_invalid_credentials(client, monkeypatch):
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_username_uncached",
+        AsyncMock(return_value=None),
+    )
+    monkeypatch.setattr("src.services.auth.Hash.verify_password", MagicMock())
 
-        assert response.status_code == 401
-        assert response.json() == {"detail": "Incorrect login or/and password."}
+    response = client.post(
+        "api/auth/login", data={"username": "deadpool", "password": "wrongpassword"}
+    )
 
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Incorrect login or/and password."}
 
-@pytest.mark.asyncio
-async def test_login_user_unconfirmed(client):
-    with patch(
-        "src.services.users.UserService.get_user_by_username"
-    ) as mock_get_user_by_username, patch(
-        "src.services.auth.Hash.verify_password"
-    ) as mock_verify_password:
 
-        mock_get_user_by_username.return_value = MagicMock(
-            username="deadpool", password="hashedpassword", confirmed=False
-        )
-        mock_verify_password.return_value = True
-        response = client.post(
-            "api/auth/login", data={"username": "deadpool", "password": "12345678"}
-        )
+def test_login_user_unconfirmed(client, monkeypatch):
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_username_uncached",
+        AsyncMock(
+            return_value=SimpleNamespace(
+                username="deadpool", password="hashedpassword", confirmed=False
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        "src.services.auth.Hash.verify_password", MagicMock(return_value=True)
+    )
 
-        assert response.status_code == 401
-        assert response.json() == {"detail": "User is not confirmed."}
+    response = client.post(
+        "api/auth/login", data={"username": "deadpool", "password": "12345678"}
+    )
 
+    assert response.status_code == 401
+    assert response.json() == {"detail": "User is not confirmed."}
 
-@pytest.mark.asyncio
-async def test_login_user_incorrect_password(client):
-    with patch(
-        "src.services.users.UserService.get_user_by_username"
-    ) as mock_get_user_by_username, patch(
-        "src.services.auth.Hash.verify_password"
-    ) as mock_verify_password:
-        mock_get_user_by_username.return_value = MagicMock(
-            username="deadpool", password="hashedpassword", confirmed=True
-        )
 
-        mock_verify_password.return_value = False
-        response = client.post(
-            "api/auth/login", data={"username": "deadpool", "password": "wrongpassword"}
-        )
+def test_login_user_incorrect_password(client, monkeypatch):
+    monkeypatch.setattr(
+        "src.services.users.UserService.get_user_by_username_uncached",
+        AsyncMock(
+            return_value=SimpleNamespace(
+                username="deadpool", password="hashedpassword", confirmed=True
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        "src.services.auth.Hash.verify_password", MagicMock(return_value=False)
+    )
 
-        assert response.status_code == 401
-        assert response.json() == {"detail": "Incorrect login or/and password."}
+    response = client.post(
+        "api/auth/login", data={"username": "deadpool", "password": "wrongpassword"}
+    )
 
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Incorrect login or/and password."}
 
-@pytest.mark.asyncio
-async def test_verify_email(client, get_token, mock_dependencies):
+
+def test_verify_email(client, get_token, mock_dependencies):
     mock_user_service, mock_logger, mock_update_cached_current_user = mock_dependencies
     token = get_token
     response = client.get(f"api/auth/verify_email/{token}")
@@ -480,12 +443,11 @@ async def test_verify_email(client, get_token, mock_dependencies):
     assert response.json()["message"] == "Email has been successfully confirmed."
     mock_user_service.verify_email.assert_called_once_with("test_email@example.com")
     mock_logger.info.assert_called_once_with(
-        "Email address test_email@example.com verified."
+        "Email address %s verified.", "test_email@example.com"
     )
 
 
-@pytest.mark.asyncio
-async def test_verify_email_user_not_found(client, get_token, mock_dependencies):
+def test_verify_email_user_not_found(client, get_token, mock_dependencies):
     mock_user_service, mock_logger, mock_update_cached_current_user = mock_dependencies
     token = get_token
 
@@ -501,8 +463,7 @@ async def test_verify_email_user_not_found(client, get_token, mock_dependencies)
     mock_update_cached_current_user.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_verify_email_already_confirmed(client, get_token, mock_dependencies):
+def test_verify_email_already_confirmed(client, get_token, mock_dependencies):
     mock_user_service, mock_logger, mock_update_cached_current_user = mock_dependencies
     token = get_token
 
@@ -520,11 +481,10 @@ async def test_verify_email_already_confirmed(client, get_token, mock_dependenci
     mock_update_cached_current_user.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_password_reset_user_not_found(client, mock_dependencies):
+def test_password_reset_user_not_found(client, mock_dependencies):
     mock_user_service, mock_logger, mock_update_cached_current_user = mock_dependencies
     request_data = {"email": "non_existent_email@example.com"}
-    mock_user_service.get_user_by_email = AsyncMock(return_value=None)
+    mock_user_service.get_user_by_email_uncached = AsyncMock(return_value=None)
 
     response = client.post("api/auth/password-reset/", json=request_data)
 
@@ -536,17 +496,19 @@ async def test_password_reset_user_not_found(client, mock_dependencies):
     mock_update_cached_current_user.assert_not_called()
 
 
-@pytest.mark.asyncio
-async def test_password_reset_success(client, mock_dependencies):
+def test_password_reset_success(client, mock_dependencies):
     mock_user_service, mock_logger, mock_update_cached_current_user = mock_dependencies
 
     mock_user = AsyncMock()
     mock_user.email = "test@example.com"
-    mock_user_service.get_user_by_email = AsyncMock(return_value=mock_user)
+    mock_user_service.get_user_by_email_uncached = AsyncMock(return_value=mock_user)
 
-    with patch(
-        "src.api.auth.create_token", return_value="test_token"
-    ) as mock_create_token, patch("src.api.auth.send_reset_email") as mock_send_email:
+    with patch.multiple(
+        "src.api.auth", create_token=DEFAULT, enqueue_email=DEFAULT
+    ) as mocks:
+        mock_create_token = mocks["create_token"]
+        mock_send_email = mocks["enqueue_email"]
+        mock_create_token.return_value = "test_token"
 
         response = client.post(
             "/api/auth/password-reset/", json={"email": "test@example.com"}
@@ -555,20 +517,23 @@ async def test_password_reset_success(client, mock_dependencies):
         assert response.status_code == 200
         assert response.json()["message"] == "Reset password email sent"
         mock_create_token.assert_called_once_with(payload={"sub": "test@example.com"})
-        mock_send_email.assert_called_once_with(
-            "test@example.com", "test_token", "http://testserver/"
+        mock_send_email.assert_awaited_once_with(
+            "send_reset_email",
+            "test@example.com",
+            "test_token",
+            "http://testserver/",
+            job_id="send_reset_email:test@example.com",
         )
         mock_logger.info.assert_called_once_with(
-            'Reset password email sent for a user with email address "test@example.com".'
+            'Reset password email sent for a user with email address "%s".',
+            "test@example.com",
         )
         mock_update_cached_current_user.assert_called_once_with(mock_user)
 
 
-@pytest.mark.asyncio
 @patch("src.api.auth.get_email_from_token", new_callable=AsyncMock)
-@patch("src.api.auth.UserService")
-async def test_password_reset_confirm_success(
-    mock_user_service_cls, mock_get_email_from_token, client
+def test_password_reset_confirm_success(
+    mock_get_email_from_token, client, mock_user_service
 ):
     test_email = "test@example.com"
     test_password = "newpassword123"
@@ -576,10 +541,8 @@ async def test_password_reset_confirm_success(
 
     mock_get_email_from_token.return_value = test_email
 
-    mock_user_service = AsyncMock()
-    mock_user_service.get_user_by_email.return_value = User(email=test_email)
+    mock_user_service.get_user_by_email_uncached.return_value = User(email=test_email)
     mock_user_service.update_user.return_value = True
-    mock_user_service_cls.return_value = mock_user_service
 
     payload = {"token": test_token, "password": test_password}
 
@@ -588,24 +551,20 @@ async def test_password_reset_confirm_success(
     assert response.status_code == 200
     assert response.json() == {"message": "Password updated"}
     mock_get_email_from_token.assert_awaited_once_with(test_token)
-    mock_user_service.get_user_by_email.assert_awaited_once_with(test_email)
+    mock_user_service.get_user_by_email_uncached.assert_awaited_once_with(test_email)
     mock_user_service.update_user.assert_awaited_once()
 
 
-@pytest.mark.asyncio
 @patch("src.api.auth.get_email_from_token", new_callable=AsyncMock)
-@patch("src.api.auth.UserService")
-async def test_password_reset_confirm_invalid_token(
-    mock_user_service_cls, mock_get_email_from_token, client
+def test_password_reset_confirm_invalid_token(
+    mock_get_email_from_token, client, mock_user_service
 ):
     test_token = "invalidtoken"
     test_password = "anypassword"
 
     mock_get_email_from_token.return_value = "notfound@example.com"
 
-    mock_user_service = AsyncMock()
-    mock_user_service.get_user_by_email.return_value = None
-    mock_user_service_cls.return_value = mock_user_service
+    mock_user_service.get_user_by_email_uncached.return_value = None
 
     payload = {"token": test_token, "password": test_password}
 
@@ -613,3 +572,19 @@ async def test_password_reset_confirm_invalid_token(
 
     assert response.status_code == 400
     assert response.json()["detail"] == "Invalid or expired token"
+
+
+def test_login_rate_limit_returns_429_with_retry_after(client, monkeypatch):
+    storage = MemoryStorage()
+    monkeypatch.setattr(limiter, "_storage", storage)
+    monkeypatch.setattr(limiter, "_limiter", FixedWindowRateLimiter(storage))
+    monkeypatch.setattr(limiter, "enabled", True)
+
+    responses = [
+        client.post("api/auth/login", content=LOGIN_FORM, headers=FORM_HEADERS)
+        for _ in range(6)
+    ]
+
+    assert [response.status_code for response in responses] == [401] * 5 + [429]
+    retry_after = int(responses[-1].headers["Retry-After"])
+    assert 0 < retry_after <= 60
@@ -1,25 +1,55 @@
+import asyncio
+from datetime import date
 from unittest.mock import patch
+
+import pytest
+from sqlalchemy import insert
 from sqlalchemy.exc import SQLAlchemyError
 
+from conftest import engine, test_user
+from src.database.models import Contact
 from src.exceptions.exceptions import HTTPNotFoundException
 
 
-def test_get_contacts_authenticated(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    contact_data = {
-        "user_id": 1,
-        "first_name": "Deadpool",
-        "last_name": "Wade",
-        "email": "deadpool@example.com",
-        "phone": "1234567890",
-        "birthday": "1980-10-12",
-    }
-
-    create_contact_response = client.post(
-        "/api/contacts/", json=contact_data, headers=headers
-    )
-    assert create_contact_response.status_code == 201, create_contact_response.text
-    response = client.get("/api/contacts/", headers=headers)
+seed_contacts = [
+    {
+        "first_name": "Wade",
+        "last_name": "Wilson",
+        "email": "wade@example.com",
+        "phone": "123456789",
+        "birthday": date(1980, 5, 10),
+    },
+    {
+        "first_name": "Logan",
+        "last_name": "Howlett",
+        "email": "logan@example.com",
+        "phone": "987654321",
+        "birthday": date(1975, 11, 20),
+    },
+]
+
+
+@pytest.fixture(scope="module")
+def seeded_contacts(init_models_wrap):
+    async def seed():
+        async with engine.begin() as conn:
+            result = await conn.execute(
+                insert(Contact)
+                .values(
+                    [
+                        {**contact, "user_id": test_user["id"]}
+                        for contact in seed_contacts
+                    ]
+                )
+                .returning(Contact.id)
+            )
+            return result.scalars().all()
+
+    return asyncio.run(seed())
+
+
+def test_get_contacts_authenticated(client, auth_headers, seeded_contacts):
+    response = client.get("/api/contacts/", headers=auth_headers)
 
     assert response.status_code == 200, response.text
     data = response.json()
@@ -31,123 +61,192 @@ def test_get_contacts_authenticated(client, get_token):
     assert "email" in data[0], "Email field is missing"
 
 
-def test_get_contacts_with_search(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    contacts = [
-        {
-            "first_name": "Wade",
-            "last_name": "Wilson",
-            "email": "wade@example.com",
-            "phone": "123456789",
-            "birthday": "1980-05-10",
-        },
-        {
-            "first_name": "Logan",
-            "last_name": "Howlett",
-            "email": "logan@example.com",
-            "phone": "987654321",
-            "birthday": "1975-11-20",
-        },
-    ]
-
-    for contact in contacts:
-        response = client.post("/api/contacts/", json=contact, headers=headers)
-        assert response.status_code == 201, response.text
-
+def test_get_contacts_with_search(client, auth_headers, seeded_contacts):
     response = client.get(
-        "/api/contacts/", headers=headers, params={"search": "Wilson"}
+        "/api/contacts/", headers=auth_headers, params={"search": "Wilson"}
     )
     assert response.status_code == 200, response.text
 
     data = response.json()
 
+    assert response.headers["X-Total-Count"] == "1"
     assert len(data) == 1, f"Expected 1 contact, got {len(data)}"
     assert data[0]["first_name"] == "Wade"
     assert data[0]["last_name"] == "Wilson"
     assert data[0]["email"] == "wade@example.com"
 
 
-def test_get_contact_sqlalchemy_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    error_instance = SQLAlchemyError("Database error occurred.")
-
-    with patch("src.api.contacts.ContactsService.get_all", side_effect=error_instance):
-        response = client.get("api/contacts/", headers=headers)
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Database error occurred."}
+contact_payload = {
+    "first_name": "Bruce",
+    "last_name": "Wayne",
+    "email": "bruce@wayne.com",
+    "phone": "1234567890",
+    "birthday": "1985-02-19",
+}
 
 
-def test_get_contact_unexpected_exception(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    error_instance = Exception("Unexpected error occurred.")
+@pytest.mark.parametrize(
+    "method, path, body, service_method, error_cls, message",
+    [
+        (
+            "get",
+            "/api/contacts/",
+            None,
+            "get_all_with_total",
+            SQLAlchemyError,
+            "Database error occurred.",
+        ),
+        (
+            "get",
+            "/api/contacts/",
+            None,
+            "get_all_with_total",
+            Exception,
+            "Unexpected error occurred.",
+        ),
+        ("get", "/api/contacts/1", None, "get_by_id", SQLAlchemyError, "DB failure"),
+        (
+            "get",
+            "/api/contacts/1",
+            None,
+            "get_by_id",
+            Exception,
+            "An unexpected error occurred.",
+        ),
+        (
+            "post",
+            "/api/contacts/",
+            contact_payload,
+            "create",
+            SQLAlchemyError,
+            "Database error occurred.",
+        ),
+        (
+            "post",
+            "/api/contacts/",
+            contact_payload,
+            "create",
+            Exception,
+            "Unexpected error occurred.",
+        ),
+        (
+            "patch",
+            "/api/contacts/1",
+            contact_payload,
+            "update_by_id",
+            SQLAlchemyError,
+            "Database error occurred.",
+        ),
+        (
+            "patch",
+            "/api/contacts/1",
+            contact_payload,
+            "update_by_id",
+            Exception,
+            "Unexpected error occurred.",
+        ),
+        (
+            "delete",
+            "/api/contacts/1",
+            None,
+            "delete_by_id_returning",
+            SQLAlchemyError,
+            "DB Error",
+        ),
+        (
+            "delete",
+            "/api/contacts/1",
+            None,
+            "delete_by_id_returning",
+            Exception,
+            "Something went wrong",
+        ),
+    ],
+    ids=[
+        "list-db-error",
+        "list-unexpected-error",
+        "get-db-error",
+        "get-unexpected-error",
+        "create-db-error",
+        "create-unexpected-error",
+        "update-db-error",
+        "update-unexpected-error",
+        "delete-db-error",
+        "delete-unexpected-error",
+    ],
+)
+def test_contacts_service_errors_return_500(
+    client, auth_headers, method, path, body, service_method, error_cls, message
+):
+    kwargs = {"headers": auth_headers}
+    if body is not None:
+        kwargs["json"] = body
 
-    with patch("src.api.contacts.ContactsService.get_all", side_effect=error_instance):
-        response = client.get("api/contacts/", headers=headers)
+    with patch(
+        f"src.api.contacts.ContactsService.{service_method}",
+        side_effect=error_cls(message),
+    ):
+        response = client.request(method.upper(), path, **kwargs)
 
     assert response.status_code == 500
-    assert response.json() == {"detail": "Unexpected error occurred."}
+    assert response.json() == {"detail": message}
 
 
-def test_get_contacts_success(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    contact_data = {
-        "first_name": "Test",
-        "last_name": "User",
-        "email": "testuser@example.com",
-        "phone": "1234567890",
-        "birthday": "1990-01-01",
-    }
+def test_get_contacts_success(client, auth_headers, seeded_contacts):
+    contact_id = seeded_contacts[0]
 
-    create_response = client.post("api/contacts/", json=contact_data, headers=headers)
-    assert create_response.status_code == 201, create_response.text
-    contact_id = create_response.json()["id"]
-
-    response = client.get(f"api/contacts/{contact_id}", headers=headers)
+    response = client.get(f"api/contacts/{contact_id}", headers=auth_headers)
     assert response.status_code == 200
     data = response.json()
     assert data["id"] == contact_id
-    assert data["first_name"] == "Test"
+    assert data["first_name"] == seed_contacts[0]["first_name"]
 
 
-def test_get_contact_by_id_sqlalchemy_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    error_instance = SQLAlchemyError("DB failure")
+def test_get_contacts_cursor_pagination(client, auth_headers):
+    for first_name, last_name in [("Alpha", "Aardvark"), ("Beta", "Aardvark")]:
+        create_response = client.post(
+            "api/contacts/",
+            json={
+                "first_name": first_name,
+                "last_name": last_name,
+                "email": f"{first_name.lower()}@aardvark.com",
+                "phone": "1234567890",
+                "birthday": "1990-01-01",
+            },
+            headers=auth_headers,
+        )
+        assert create_response.status_code == 201, create_response.text
 
-    with patch(
-        "src.api.contacts.ContactsService.get_by_id", side_effect=error_instance
-    ):
-        response = client.get("api/contacts/1", headers=headers)
+    first_page = client.get("api/contacts/?limit=1", headers=auth_headers)
+    assert first_page.status_code == 200, first_page.text
+    assert first_page.json()[0]["first_name"] == "Alpha"
+    cursor = first_page.headers["X-Next-Cursor"]
 
-    assert response.status_code == 500
-    assert response.json() == {"detail": "DB failure"}
+    second_page = client.get(
+        "api/contacts/", params={"limit": 1, "cursor": cursor}, headers=auth_headers
+    )
+    assert second_page.status_code == 200, second_page.text
+    assert second_page.json()[0]["first_name"] == "Beta"
+    assert "X-Total-Count" not in second_page.headers
 
 
-def test_get_contact_by_id_unexpected_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    error_instance = Exception("An unexpected error occurred.")
+def test_get_contacts_invalid_cursor(client, auth_headers):
+    response = client.get("api/contacts/?cursor=invalid", headers=auth_headers)
 
-    with patch(
-        "src.api.contacts.ContactsService.get_by_id", side_effect=error_instance
-    ):
-        response = client.get("api/contacts/1", headers=headers)
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "An unexpected error occurred."}
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
 
 
-def test_get_contact_by_id_not_found(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+def test_get_contact_by_id_not_found(client, auth_headers):
 
     with patch("src.api.contacts.ContactsService.get_by_id", return_value=None):
-        response = client.get("/api/contacts/1", headers=headers)
+        response = client.get("/api/contacts/1", headers=auth_headers)
 
     assert response.status_code == 404
     assert response.json() == {"detail": "Contact not found"}
 
 
-def test_get_contact_by_id_success(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+def test_get_contact_by_id_success(client, auth_headers):
 
     mock_contact = {
         "id": 1,
@@ -160,7 +259,7 @@ def test_get_contact_by_id_success(client, get_token):
     }
 
     with patch("src.api.contacts.ContactsService.get_by_id", return_value=mock_contact):
-        response = client.get("/api/contacts/1", headers=headers)
+        response = client.get("/api/contacts/1", headers=auth_headers)
 
     assert response.status_code == 200
     data = response.json()
@@ -171,98 +270,43 @@ def test_get_contact_by_id_success(client, get_token):
     assert data["email"] == mock_contact["email"]
 
 
-def test_create_contact_sqlalchemy_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    error_instance = SQLAlchemyError("Database error occurred.")
-
-    with patch("src.api.contacts.ContactsService.create", side_effect=error_instance):
-        response = client.post(
-            "/api/contacts/",
-            json={
-                "first_name": "Bruce",
-                "last_name": "Wayne",
-                "email": "bruce@wayne.com",
-                "phone": "1234567890",
-                "birthday": "1985-02-19",
-            },
-            headers=headers,
-        )
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Database error occurred."}
-
-
-def test_create_contact_unexpected_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    error_instance = Exception("Unexpected error occurred.")
-
-    with patch("src.api.contacts.ContactsService.create", side_effect=error_instance):
-        response = client.post(
-            "/api/contacts/",
-            json={
-                "first_name": "Clark",
-                "last_name": "Kent",
-                "email": "clark@dailyplanet.com",
-                "phone": "9876543210",
-                "birthday": "1978-06-18",
-            },
-            headers=headers,
-        )
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Unexpected error occurred."}
-
-
-def test_update_contact_sqlalchemy_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-
-    error_instance = SQLAlchemyError("Database error occurred.")
-
-    with patch(
-        "src.api.contacts.ContactsService.update_by_id", side_effect=error_instance
-    ):
-        response = client.patch(
-            "/api/contacts/1",
-            json={
-                "first_name": "Bruce",
-                "last_name": "Wayne",
-                "email": "bruce@wayne.com",
-                "phone": "1234567890",
-                "birthday": "1985-02-19",
-            },
-            headers=headers,
-        )
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Database error occurred."}
+def test_create_contact_duplicate_email(client, auth_headers):
+    contact_data = {
+        "first_name": "Bruce",
+        "last_name": "Banner",
+        "email": "bruce@banner.com",
+        "phone": "1234567890",
+        "birthday": "1969-12-18",
+    }
 
+    first = client.post("/api/contacts/", json=contact_data, headers=auth_headers)
+    assert first.status_code == 201, first.text
+    second = client.post("/api/contacts/", json=contact_data, headers=auth_headers)
 
-def test_update_contact_unexpected_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+    assert second.status_code == 409, second.text
+    assert second.json() == {
+        "detail": "Cannot create contact, email already registered."
+    }
 
-    error_instance = Exception("Unexpected error occurred.")
 
-    with patch(
-        "src.api.contacts.ContactsService.update_by_id", side_effect=error_instance
-    ):
-        response = client.patch(
-            "/api/contacts/1",
-            json={
-                "first_name": "Clark",
-                "last_name": "Kent",
-                "email": "clark@dailyplanet.com",
-                "phone": "9876543210",
-                "birthday": "1978-06-18",
-            },
-            headers=headers,
-        )
+def test_create_contact_invalid_birthday(client, auth_headers):
+    response = client.post(
+        "/api/contacts/",
+        json={
+            "first_name": "Peter",
+            "last_name": "Parker",
+            "email": "peter@dailybugle.com",
+            "phone": "1234567890",
+            "birthday": "2001-02-30",
+        },
+        headers=auth_headers,
+    )
 
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Unexpected error occurred."}
+    assert response.status_code == 400, response.text
+    assert response.json()["detail"][0]["loc"] == ["body", "birthday"]
 
 
-def test_update_contact_success(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+def test_update_contact_success(client, auth_headers):
     contact_data = {
         "id": 1,
         "first_name": "Peter",
@@ -275,71 +319,43 @@ def test_update_contact_success(client, get_token):
     with patch(
         "src.api.contacts.ContactsService.update_by_id", return_value=contact_data
     ):
-        response = client.patch("/api/contacts/1", json=contact_data, headers=headers)
+        response = client.patch(
+            "/api/contacts/1", json=contact_data, headers=auth_headers
+        )
 
     assert response.status_code == 200
     assert response.json() == contact_data
 
 
-def test_update_contact_not_found(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+def test_update_contact_not_found(client, auth_headers):
 
     with patch("src.api.contacts.ContactsService.update_by_id", return_value=None):
-        response = client.get("/api/contacts/10", headers=headers)
+        response = client.get("/api/contacts/10", headers=auth_headers)
 
     assert response.status_code == 404
     assert response.json() == {"detail": "Not found"}
 
 
-def test_delete_contact_success(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+def test_delete_contact_success(client, auth_headers):
     with patch(
-        "src.api.contacts.ContactsService.get_by_id",
-        return_value={"id": 1, "first_name": "Peter", "last_name": "Parker"},
-    ), patch("src.api.contacts.ContactsService.delete_by_id"):
-        response = client.delete("/api/contacts/1", headers=headers)
+        "src.api.contacts.ContactsService.delete_by_id_returning", return_value=1
+    ):
+        response = client.delete("/api/contacts/1", headers=auth_headers)
 
     assert response.status_code == 204
     assert response.text == ""
 
 
-def test_delete_contact_not_found(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
+def test_delete_contact_not_found(client, auth_headers):
     with patch("src.api.contacts.ContactsService.get_by_id", return_value=None):
-        response = client.get("/api/contacts/1", headers=headers)
+        response = client.get("/api/contacts/1", headers=auth_headers)
 
     assert response.status_code == 404
     assert response.json() == {"detail": "Contact not found"}
 
 
-def test_delete_not_found(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    with patch("src.api.contacts.ContactsService.delete_by_id", return_value=None):
-        response = client.get("/api/contacts/12345678", headers=headers)
+def test_delete_contact_returning_not_found(client, auth_headers):
+    response = client.delete("/api/contacts/12345678", headers=auth_headers)
 
     assert response.status_code == 404
     assert response.json() == {"detail": "Not found"}
-
-
-def test_delete_contact_db_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    with patch(
-        "src.api.contacts.ContactsService.get_by_id",
-        side_effect=SQLAlchemyError("DB Error"),
-    ):
-        response = client.delete("/api/contacts/1", headers=headers)
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "DB Error"}
-
-
-def test_delete_contact_unexpected_error(client, get_token):
-    headers = {"Authorization": f"Bearer {get_token}"}
-    with patch(
-        "src.api.contacts.ContactsService.get_by_id",
-        side_effect=Exception("Something went wrong"),
-    ):
-        response = client.delete("/api/contacts/1", headers=headers)
-
-    assert response.status_code == 500
-    assert response.json() == {"detail": "Something went wrong"}
@@ -1,11 +1,15 @@
+import time
 from unittest.mock import patch
+
+import jwt
+
 from conftest import test_user
+from main import app
+from src.conf.config import get_settings, settings
 
 
-def test_get_me(client, get_token):
-    token = get_token
-    headers = {"Authorization": f"Bearer {token}"}
-    response = client.get("api/users/me", headers=headers)
+def test_get_me(client, auth_headers):
+    response = client.get("api/users/me", headers=auth_headers)
     assert response.status_code == 200, response.text
     data = response.json()
     assert data["username"] == test_user["username"]
@@ -14,15 +18,14 @@ def test_get_me(client, get_token):
 
 
 @patch("src.services.upload.UploadService.upload_file")
-def test_update_avatar_user(mock_upload_file, client, get_token):
+def test_update_avatar_user(mock_upload_file, client, auth_headers):
     fake_url = "http://example.com/avatar.jpg"
     mock_upload_file.return_value = fake_url
-    headers = {"Authorization": f"Bearer {get_token}"}
 
     # Файл, який буде відправлено
     file_data = {"file": ("avatar.jpg", b"fake image content", "image/jpeg")}
 
-    response = client.patch("/api/users/avatar", headers=headers, files=file_data)
+    response = client.patch("/api/users/avatar", headers=auth_headers, files=file_data)
 
     assert response.status_code == 200, response.text
 
@@ -31,3 +34,33 @@ def test_update_avatar_user(mock_upload_file, client, get_token):
     assert data["email"] == test_user["email"]
     assert data["avatar"] == fake_url
     mock_upload_file.assert_called_once()
+
+
+def test_get_me_uses_overridden_settings(client, monkeypatch):
+    overridden = settings.model_copy(
+        update={"JWT_SECRET": "overridden-secret-for-the-settings-test"}
+    )
+    monkeypatch.setitem(app.dependency_overrides, get_settings, lambda: overridden)
+    payload = {"sub": test_user["username"], "exp": int(time.time()) + 60}
+
+    default_token = jwt.encode(
+        {**payload, "jti": "default"},
+        settings.JWT_SECRET,
+        algorithm=settings.JWT_ALGORITHM,
+    )
+    overridden_token = jwt.encode(
+        {**payload, "jti": "overridden"},
+        overridden.JWT_SECRET,
+        algorithm=overridden.JWT_ALGORITHM,
+    )
+
+    rejected = client.get(
+        "api/users/me", headers={"Authorization": f"Bearer {default_token}"}
+    )
+    accepted = client.get(
+        "api/users/me", headers={"Authorization": f"Bearer {overridden_token}"}
+    )
+
+    assert rejected.status_code == 401, rejected.text
+    assert accepted.status_code == 200, accepted.text
+    assert accepted.json()["username"] == test_user["username"]
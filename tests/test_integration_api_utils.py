@@ -1,3 +1,10 @@
+import logging
+import time
+
+from main import app
+from src.database.db import get_db
+
+
 def test_healthchecker_success(client):
     response = client.get("/api/healthchecker")
     data = response.json()
@@ -7,9 +14,38 @@ def test_healthchecker_success(client):
     assert data["message"] == "Welcome to FastAPI!"
 
 
-def test_healthchecker_success_fail(client_fail_healthchecker):
+def test_healthchecker_uses_cached_result(client_fail_healthchecker, monkeypatch):
+    monkeypatch.setattr("src.api.utils._last_ok", time.monotonic())
+    response = client_fail_healthchecker.get("api/healthchecker")
+
+    assert response.status_code == 200, response.text
+    assert response.json()["message"] == "Welcome to FastAPI!"
+
+
+def test_healthchecker_success_fail(client_fail_healthchecker, monkeypatch):
+    monkeypatch.setattr("src.api.utils._last_ok", 0.0)
     response = client_fail_healthchecker.get("api/healthchecker")
     data = response.json()
 
     assert response.status_code == 500, response.text
     assert "detail" in data
+
+
+def test_unexpected_error_is_logged_and_keeps_cors_headers(client, caplog, monkeypatch):
+    async def broken_get_db():
+        raise RuntimeError("boom")
+        yield
+
+    monkeypatch.setitem(app.dependency_overrides, get_db, broken_get_db)
+    with caplog.at_level(logging.ERROR, logger="src.exceptions.middleware"):
+        response = client.get(
+            "api/healthchecker", headers={"Origin": "http://example.com"}
+        )
+
+    assert response.status_code == 500, response.text
+    assert response.json() == {"detail": "boom"}
+    assert "access-control-allow-origin" in response.headers
+    assert any(
+        record.exc_info and record.exc_info[0] is RuntimeError
+        for record in caplog.records
+    )
@@ -0,0 +1,11 @@
+from src.conf.config import Settings, get_settings, settings
+
+
+def test_get_settings_returns_cached_instance():
+    assert get_settings() is get_settings() is settings
+
+
+def test_cloudinary_api_key_keeps_leading_zeros(monkeypatch):
+    monkeypatch.setenv("CLOUDINARY_API_KEY", "000123")
+
+    assert Settings().CLOUDINARY_API_KEY == "000123"
@@ -1,20 +1,16 @@
 import pytest
-from datetime import datetime, timedelta
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database.models import Contact, User
 from src.repository.contacts import ContactsRepository
 from src.schemas.contacts import ContactBase, ContactUpdate
+from conftest import all_result, areturn, scalar_one
 
-
-@pytest.fixture
-def mock_session():
-    mock_session = AsyncMock(spec=AsyncSession)
-    return mock_session
+pytestmark = pytest.mark.asyncio(loop_scope="module")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user():
     return User(id=1, username="Mock", email="testuser@example.com", role="admin")
 
@@ -24,21 +20,21 @@ def contacts_repository(mock_session, user):
     return ContactsRepository(mock_session, user)
 
 
-@pytest.mark.asyncio
 async def test_get_all(contacts_repository, mock_session, user):
-    mock_result = MagicMock()
-    mock_result.scalars.return_value.all.return_value = [
-        Contact(
-            id=1,
-            first_name="Test",
-            last_name="Mock",
-            email="test@example.com",
-            phone="1111",
-            birthday="1980-01-01",
-            user=user,
-        )
-    ]
-    mock_session.execute = AsyncMock(return_value=mock_result)
+    mock_result = all_result(
+        [
+            Contact(
+                id=1,
+                first_name="Test",
+                last_name="Mock",
+                email="test@example.com",
+                phone="1111",
+                birthday="1980-01-01",
+                user=user,
+            )
+        ]
+    )
+    mock_session.scalars = areturn(mock_result)
     contacts = await contacts_repository.get_all()
 
     assert len(contacts) == 1
@@ -49,11 +45,31 @@ async def test_get_all(contacts_repository, mock_session, user):
     assert contacts[0].birthday == "1980-01-01"
 
 
-@pytest.mark.asyncio
+async def test_get_all_filters_by_user_id(contacts_repository, mock_session):
+    mock_result = all_result([])
+    mock_session.scalars = AsyncMock(return_value=mock_result)
+    await contacts_repository.get_all()
+
+    stmt = mock_session.scalars.call_args[0][0]
+    assert "contacts.user_id = :user_id_1" in str(stmt)
+    assert stmt.compile().params["user_id_1"] == 1
+
+
+async def test_get_all_with_cursor(contacts_repository, mock_session):
+    mock_result = all_result([])
+    mock_session.scalars = AsyncMock(return_value=mock_result)
+    await contacts_repository.get_all(limit=10, cursor=("Wayne", 5))
+
+    stmt = mock_session.scalars.call_args[0][0]
+    sql = str(stmt)
+    assert "(contacts.last_name, contacts.id) > (" in sql
+    assert "ORDER BY contacts.last_name, contacts.id" in sql
+    assert "OFFSET" not in sql
+
+
 async def test_get_contact_by_email(contacts_repository, mock_session, user):
     mock_email = "test@example.com"
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = Contact(
+    mock_session.scalar.return_value = Contact(
         id=1,
         first_name="Test",
         last_name="Mock",
@@ -62,7 +78,6 @@ async def test_get_contact_by_email(contacts_repository, mock_session, user):
         birthday="1980-01-01",
         user=user,
     )
-    mock_session.execute = AsyncMock(return_value=mock_result)
     contact = await contacts_repository.get_contact_by_email(email=mock_email)
 
     assert contact is not None
@@ -70,10 +85,8 @@ async def test_get_contact_by_email(contacts_repository, mock_session, user):
     assert contact.email == mock_email
 
 
-@pytest.mark.asyncio
 async def test_get_contact_by_id(contacts_repository, mock_session, user):
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = Contact(
+    mock_session.scalar.return_value = Contact(
         id=1,
         first_name="Test",
         last_name="Mock",
@@ -82,7 +95,6 @@ async def test_get_contact_by_id(contacts_repository, mock_session, user):
         birthday="1980-01-01",
         user=user,
     )
-    mock_session.execute = AsyncMock(return_value=mock_result)
     contact = await contacts_repository.get_contact_by_id(contact_id=1)
 
     assert contact is not None
@@ -90,7 +102,6 @@ async def test_get_contact_by_id(contacts_repository, mock_session, user):
     assert contact.first_name == "Test"
 
 
-@pytest.mark.asyncio
 async def test_create(contacts_repository, mock_session):
     contact_data = ContactBase(
         first_name="Test",
@@ -108,7 +119,6 @@ async def test_create(contacts_repository, mock_session):
     mock_session.refresh.assert_awaited_once_with(result)
 
 
-@pytest.mark.asyncio
 async def test_update(contacts_repository, mock_session, user):
     contact_data = ContactUpdate(
         first_name="Updated Test",
@@ -116,49 +126,76 @@ async def test_update(contacts_repository, mock_session, user):
         email="test@example.com",
         phone="1111",
     )
-    existing_contact = Contact(
+    updated_contact = Contact(
         id=1,
-        first_name="Test",
+        first_name="Updated Test",
         last_name="Mock",
         email="test@example.com",
         phone="1111",
         birthday="1980-01-01",
         user=user,
     )
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = existing_contact
+    mock_result = scalar_one(updated_contact)
     mock_session.execute = AsyncMock(return_value=mock_result)
     result = await contacts_repository.update(contact_id=1, body=contact_data)
 
-    assert result is not None
-    assert result.first_name == "Updated Test"
+    assert result is updated_contact
+    mock_session.execute.assert_awaited_once()
+    stmt = mock_session.execute.call_args[0][0]
+    assert str(stmt).startswith("UPDATE contacts SET")
+    assert "RETURNING" in str(stmt)
     mock_session.commit.assert_awaited_once()
-    mock_session.refresh.assert_awaited_once_with(existing_contact)
+    mock_session.refresh.assert_not_awaited()
 
 
-@pytest.mark.asyncio
-async def test_delete(contacts_repository, mock_session, user):
-    existing_tag = Contact(
-        id=1,
-        first_name="Test To Delete",
-        last_name="Mock",
-        email="test@example.com",
-        phone="1111",
-        birthday="1980-01-01",
-        user=user,
+async def test_update_not_found(contacts_repository, mock_session):
+    mock_result = scalar_one(None)
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    result = await contacts_repository.update(
+        contact_id=99, body=ContactUpdate(first_name="Nobody")
     )
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = existing_tag
+
+    assert result is None
+    mock_session.execute.assert_awaited_once()
+
+
+async def test_get_all_with_total(contacts_repository, mock_session, user):
+    contact = Contact(id=1, first_name="Test", last_name="Mock", user=user)
+    mock_result = all_result([MagicMock(Contact=contact, total=7)])
     mock_session.execute = AsyncMock(return_value=mock_result)
-    result = await contacts_repository.delete(contact_id=1)
 
-    assert result is not None
-    assert result.first_name == "Test To Delete"
-    mock_session.delete.assert_awaited_once_with(existing_tag)
+    contacts, total = await contacts_repository.get_all_with_total(skip=0, limit=1)
+
+    assert contacts == [contact]
+    assert total == 7
+    mock_session.execute.assert_awaited_once()
+    mock_session.scalar.assert_not_awaited()
+
+
+async def test_get_all_with_total_past_last_page(contacts_repository, mock_session):
+    mock_result = all_result([])
+    mock_session.execute = areturn(mock_result)
+    mock_session.scalar = AsyncMock(return_value=3)
+
+    contacts, total = await contacts_repository.get_all_with_total(skip=10, limit=5)
+
+    assert contacts == []
+    assert total == 3
+    mock_session.scalar.assert_awaited_once()
+
+
+async def test_delete_returning(contacts_repository, mock_session):
+    mock_result = scalar_one(1)
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    result = await contacts_repository.delete_returning(contact_id=1)
+
+    assert result == 1
+    mock_session.execute.assert_awaited_once()
+    assert str(mock_session.execute.call_args[0][0]).startswith("DELETE FROM contacts")
+    mock_session.delete.assert_not_awaited()
     mock_session.commit.assert_awaited_once()
 
 
-@pytest.mark.asyncio
 async def test_get_all_birthdays_within_days_same_year():
     contacts = [
         Contact(first_name="John", birthday=datetime(1990, 4, 16).date()),
@@ -168,22 +205,8 @@ async def test_get_all_birthdays_within_days_same_year():
     user = MagicMock(id=1)
     mock_session = MagicMock()
 
-    async def mock_execute(query):
-        today = datetime(2023, 4, 15).date()
-        week = today + timedelta(days=7)
-        today_mmdd = today.strftime("%m-%d")
-        week_mmdd = week.strftime("%m-%d")
-
-        filtered = [
-            c
-            for c in contacts
-            if today_mmdd <= c.birthday.strftime("%m-%d") <= week_mmdd
-        ]
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = filtered
-        return mock_result
-
-    mock_session.execute = AsyncMock(side_effect=mock_execute)
+    mock_result = all_result(contacts[:2])
+    mock_session.scalars = areturn(mock_result)
     repo = ContactsRepository(mock_session, user)
 
     with patch("src.repository.contacts.datetime") as mock_datetime:
@@ -194,7 +217,37 @@ async def test_get_all_birthdays_within_days_same_year():
     assert {c.first_name for c in result} == {"John", "Jane"}
 
 
-@pytest.mark.asyncio
+async def test_get_all_search_is_case_insensitive_in_sql(
+    contacts_repository, mock_session
+):
+    mock_session.scalars.return_value = all_result([])
+
+    await contacts_repository.get_all(search="JOHN", limit=10)
+
+    stmt = mock_session.scalars.call_args[0][0]
+    compiled = stmt.compile()
+    assert "lower(" in str(compiled)
+    assert "LIMIT" in str(compiled)
+    assert "%JOHN%" in compiled.params.values()
+
+
+async def test_get_all_birthdays_filter_uses_mmdd_expression(
+    contacts_repository, mock_session
+):
+    mock_result = all_result([])
+    mock_session.scalars = AsyncMock(return_value=mock_result)
+
+    with patch("src.repository.contacts.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime(2023, 4, 15)
+        await contacts_repository.get_all(birthdays_within_days=7)
+
+    stmt = mock_session.scalars.call_args[0][0]
+    compiled = stmt.compile()
+    assert "EXTRACT(month FROM contacts.birthday) * 100" in str(compiled)
+    assert 415 in compiled.params.values()
+    assert 422 in compiled.params.values()
+
+
 async def test_get_all_with_skip():
     contacts = [
         Contact(first_name="John"),
@@ -204,13 +257,8 @@ async def test_get_all_with_skip():
     user = MagicMock(id=1)
     mock_session = MagicMock()
 
-    async def mock_execute(query):
-        filtered = contacts[1:]
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = filtered
-        return mock_result
-
-    mock_session.execute = AsyncMock(side_effect=mock_execute)
+    mock_result = all_result(contacts[1:])
+    mock_session.scalars = areturn(mock_result)
     repo = ContactsRepository(mock_session, user)
 
     result = await repo.get_all(skip=1)
@@ -219,7 +267,6 @@ async def test_get_all_with_skip():
     assert {c.first_name for c in result} == {"Jane", "Alice"}
 
 
-@pytest.mark.asyncio
 async def test_get_all_with_limit():
     contacts = [
         Contact(first_name="John"),
@@ -229,13 +276,8 @@ async def test_get_all_with_limit():
     user = MagicMock(id=1)
     mock_session = MagicMock()
 
-    async def mock_execute(query):
-        filtered = contacts[:2]
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = filtered
-        return mock_result
-
-    mock_session.execute = AsyncMock(side_effect=mock_execute)
+    mock_result = all_result(contacts[:2])
+    mock_session.scalars = areturn(mock_result)
     repo = ContactsRepository(mock_session, user)
 
     result = await repo.get_all(limit=2)
@@ -244,7 +286,6 @@ async def test_get_all_with_limit():
     assert {c.first_name for c in result} == {"John", "Jane"}
 
 
-@pytest.mark.asyncio
 async def test_get_all_birthdays_across_new_year():
     contacts = [
         Contact(first_name="John", birthday=datetime(1990, 12, 29).date()),
@@ -254,23 +295,8 @@ async def test_get_all_birthdays_across_new_year():
     user = MagicMock(id=1)
     mock_session = MagicMock()
 
-    async def mock_execute(query):
-        today = datetime(2023, 12, 28).date()
-        week = today + timedelta(days=7)
-        today_mmdd = today.strftime("%m-%d")
-        week_mmdd = week.strftime("%m-%d")
-
-        filtered = [
-            c
-            for c in contacts
-            if c.birthday.strftime("%m-%d") >= today_mmdd
-            or c.birthday.strftime("%m-%d") <= week_mmdd
-        ]
-        mock_result = MagicMock()
-        mock_result.scalars.return_value.all.return_value = filtered
-        return mock_result
-
-    mock_session.execute = AsyncMock(side_effect=mock_execute)
+    mock_result = all_result(contacts[:2])
+    mock_session.scalars = areturn(mock_result)
     repo = ContactsRepository(mock_session, user)
 
     with patch("src.repository.contacts.datetime") as mock_datetime:
@@ -1,83 +1,48 @@
 import pytest
-from unittest.mock import AsyncMock, MagicMock
-from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock
 
 from src.database.models import Contact, User, UserRole
 from src.repository.users import UserRepository
 from src.schemas.users import UserCreate, UserUpdate
+from conftest import all_result, scalar_one
 
-
-@pytest.fixture
-def mock_session():
-    mock_session = AsyncMock(spec=AsyncSession)
-    return mock_session
+pytestmark = pytest.mark.asyncio(loop_scope="module")
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user():
     return User(id=1, username="Mock", email="testuser@example.com", role="admin")
 
 
-@pytest.fixture
-def admin_user():
-    return User(id=1, username="Mock", email="testuser@example.com", role="user")
-
-
 @pytest.fixture
 def repository(mock_session):
     return UserRepository(mock_session)
 
 
-@pytest.mark.asyncio
-async def test_get_user_by_email(repository, mock_session, user):
-    email = "test@example.com"
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = User(
-        id=1,
-        username="test",
-        email=email,
-    )
-    mock_session.execute = AsyncMock(return_value=mock_result)
-    user = await repository.get_user_by_email(email=email)
-
-    assert user is not None
-    assert user.id == 1
-    assert user.email == email
-
-
-@pytest.mark.asyncio
-async def test_get_user_by_id(repository, mock_session):
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = User(
-        id=1,
-        username="test",
-        email="test@example.com",
-    )
-    mock_session.execute = AsyncMock(return_value=mock_result)
-    user = await repository.get_user_by_id(user_id=1)
-
-    assert user is not None
-    assert user.id == 1
-    assert user.username == "test"
-
-
-@pytest.mark.asyncio
-async def test_get_user_by_username(repository, mock_session):
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = User(
+@pytest.mark.parametrize(
+    "method, kwargs",
+    [
+        ("get_user_by_email", {"email": "test@example.com"}),
+        ("get_user_by_id", {"user_id": 1}),
+        ("get_user_by_username", {"username": "test"}),
+    ],
+    ids=["email", "id", "username"],
+)
+async def test_get_user_lookup(repository, mock_session, method, kwargs):
+    mock_session.scalar.return_value = User(
         id=1,
         username="test",
         email="test@example.com",
     )
-    mock_session.execute = AsyncMock(return_value=mock_result)
-    user = await repository.get_user_by_username(username="test")
+    user = await getattr(repository, method)(**kwargs)
 
     assert user is not None
     assert user.id == 1
     assert user.username == "test"
+    assert user.email == "test@example.com"
+    mock_session.scalar.assert_awaited_once()
 
 
-@pytest.mark.asyncio
 async def test_create(repository, mock_session):
     user_data = UserCreate(
         username="test",
@@ -95,7 +60,6 @@ async def test_create(repository, mock_session):
     mock_session.refresh.assert_awaited_once_with(result)
 
 
-@pytest.mark.asyncio
 async def test_update(repository, mock_session):
     user_data = UserUpdate(password="111222")
     existing_user = User(
@@ -114,39 +78,47 @@ async def test_update(repository, mock_session):
     mock_session.refresh.assert_awaited_once_with(existing_user)
 
 
-@pytest.mark.asyncio
 async def test_update_avatar(repository, mock_session):
     email = "test@example.com"
     avatar = "avatar.url"
-    existing_user = User(username="test", email=email, avatar=None)
+    updated_user = User(username="test", email=email, avatar=avatar)
 
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = existing_user
+    mock_result = scalar_one(updated_user)
     mock_session.execute = AsyncMock(return_value=mock_result)
     result = await repository.update_avatar_url(email=email, url=avatar)
 
-    assert result is not None
-    assert result.username == "test"
-    assert result.avatar == avatar
+    assert result is updated_user
+    mock_session.execute.assert_awaited_once()
+    stmt = mock_session.execute.call_args[0][0]
+    assert stmt.compile().params["avatar"] == avatar
     mock_session.commit.assert_awaited_once()
-    mock_session.refresh.assert_awaited_once_with(existing_user)
+    mock_session.refresh.assert_not_awaited()
 
 
-@pytest.mark.asyncio
 async def test_verify_email(repository, mock_session):
     email = "test@example.com"
-    existing_user = User(
+    verified_user = User(
         username="test",
         email=email,
-        confirmed=False,
+        confirmed=True,
         role=UserRole.USER,
     )
 
-    mock_result = MagicMock()
-    mock_result.scalar_one_or_none.return_value = existing_user
+    mock_result = scalar_one(verified_user)
     mock_session.execute = AsyncMock(return_value=mock_result)
     mock_session.commit = AsyncMock()
-    await repository.verify_email(email=email)
+    result = await repository.verify_email(email=email)
 
-    assert existing_user.confirmed is True
+    assert result is verified_user
+    stmt = mock_session.execute.call_args[0][0]
+    assert stmt.compile().params["confirmed"] is True
     mock_session.commit.assert_awaited_once()
+
+
+async def test_get_users_by_email_or_username(repository, mock_session):
+    mock_result = all_result([("test@example.com", "other")])
+    mock_session.execute = AsyncMock(return_value=mock_result)
+    result = await repository.get_users_by_email_or_username("test@example.com", "test")
+
+    assert result == [("test@example.com", "other")]
+    mock_session.execute.assert_awaited_once()
@@ -1,69 +1,122 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
 from datetime import datetime, timedelta, UTC
-from jose import jwt, JWTError
+import jwt
+from jwt import PyJWTError
 from fastapi import HTTPException, Depends
+import src.services.auth as auth_module
 from src.services.auth import (
     create_access_token,
+    create_token,
     get_current_user,
+    get_current_user_id,
     get_current_user_admin,
     get_email_from_token,
+    Hash,
+    verify_password,
+    get_password_hash,
+    invalidate_cached_tokens,
 )
 from src.conf.config import settings
+from conftest import decode_token
 from src.database.models import User, UserRole
 from src.exceptions.exceptions import HTTPUnauthorizedException, HTTPBadRequestException
 
+pytestmark = pytest.mark.real_password_hashing
 
-@pytest.mark.asyncio
+
+def raising(exc):
+    def raise_exc(*args, **kwargs):
+        raise exc
+
+    return raise_exc
+
+
+@pytest.mark.asyncio(loop_scope="module")
 async def test_create_access_token_default_expiration():
     payload = {"sub": "testuser"}
     token = await create_access_token(payload)
-    decoded = jwt.decode(
-        token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
-    )
+    decoded = decode_token(token)
     assert decoded["sub"] == "testuser"
     assert "exp" in decoded
 
 
-@pytest.mark.asyncio
-async def test_get_current_user_from_cache(monkeypatch):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_from_cache(fast_patch):
     mock_user = User(id=1, username="testuser", role=UserRole.USER)
-    monkeypatch.setattr(
-        "src.services.auth.get_cached_current_user", AsyncMock(return_value=mock_user)
-    )
-    monkeypatch.setattr(
-        "src.services.auth.jwt.decode", MagicMock(return_value={"sub": "testuser"})
+    fast_patch(auth_module, get_cached_current_user=AsyncMock(return_value=mock_user))
+    fast_patch(jwt, decode=lambda *args, **kwargs: {"sub": "testuser"})
+    result = await get_current_user(
+        token="sometoken", user_service=AsyncMock(), app_settings=settings
     )
-    result = await get_current_user(token="sometoken", db=AsyncMock())
     assert result == mock_user
 
 
-@pytest.mark.asyncio
-async def test_get_current_user_from_db(monkeypatch):
-    mock_user = User(id=2, username="dbuser", role=UserRole.USER)
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_id_from_claim(monkeypatch):
     mock_user_service = AsyncMock()
-    mock_user_service.get_user_by_username.return_value = mock_user
+    mock_cached = AsyncMock()
+    monkeypatch.setattr("src.services.auth.get_cached_current_user", mock_cached)
+    token = await create_access_token({"sub": "claimuser", "uid": 7})
+
+    result = await get_current_user_id(
+        token=token, user_service=mock_user_service, app_settings=settings
+    )
+
+    assert result.id == 7
+    mock_cached.assert_not_awaited()
+    mock_user_service.get_user_by_username.assert_not_awaited()
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_id_falls_back_without_claim(monkeypatch):
+    mock_user_service = AsyncMock()
+    mock_user_service.get_user_by_username.return_value = User(
+        id=3, username="legacyuser", role=UserRole.USER
+    )
     monkeypatch.setattr(
         "src.services.auth.get_cached_current_user", AsyncMock(return_value=None)
     )
     monkeypatch.setattr("src.services.auth.update_cached_current_user", AsyncMock())
-    monkeypatch.setattr(
-        "src.services.auth.jwt.decode", MagicMock(return_value={"sub": "dbuser"})
+    token = await create_access_token({"sub": "legacyuser"})
+
+    result = await get_current_user_id(
+        token=token, user_service=mock_user_service, app_settings=settings
     )
-    monkeypatch.setattr(
-        "src.services.auth.UserService", MagicMock(return_value=mock_user_service)
+
+    assert result.id == 3
+    mock_user_service.get_user_by_username.assert_awaited_once_with("legacyuser")
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_id_invalid_token():
+    with pytest.raises(HTTPUnauthorizedException):
+        await get_current_user_id(
+            token="invalid", user_service=AsyncMock(), app_settings=settings
+        )
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_from_db(fast_patch):
+    mock_user = User(id=2, username="dbuser", role=UserRole.USER)
+    mock_user_service = AsyncMock()
+    mock_user_service.get_user_by_username.return_value = mock_user
+    fast_patch(auth_module, get_cached_current_user=AsyncMock(return_value=None))
+    fast_patch(auth_module, update_cached_current_user=AsyncMock())
+    fast_patch(jwt, decode=lambda *args, **kwargs: {"sub": "dbuser"})
+    result = await get_current_user(
+        token="token", user_service=mock_user_service, app_settings=settings
     )
-    result = await get_current_user(token="token", db=AsyncMock())
     assert result.username == "dbuser"
 
 
-@pytest.mark.asyncio
-async def test_get_current_user_invalid_token(monkeypatch):
-    monkeypatch.setattr(
-        "src.services.auth.jwt.decode", MagicMock(side_effect=JWTError("bad token"))
-    )
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_rejects_decode_error(fast_patch):
+    fast_patch(jwt, decode=raising(PyJWTError("bad token")))
     with pytest.raises(HTTPUnauthorizedException):
-        await get_current_user(token="badtoken", db=AsyncMock())
+        await get_current_user(
+            token="badtoken", user_service=AsyncMock(), app_settings=settings
+        )
 
 
 def test_get_current_user_admin_success():
@@ -80,83 +133,196 @@ def test_get_current_user_admin_forbidden():
     assert exc.value.detail == "Permission Denided"
 
 
-@pytest.mark.asyncio
-async def test_get_email_from_token_success(monkeypatch):
-    monkeypatch.setattr(
-        "src.services.auth.jwt.decode",
-        MagicMock(return_value={"sub": "user@example.com"}),
-    )
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_email_from_token_success(fast_patch):
+    fast_patch(jwt, decode=lambda *args, **kwargs: {"sub": "user@example.com"})
     email = await get_email_from_token("token")
     assert email == "user@example.com"
 
 
-@pytest.mark.asyncio
-async def test_get_email_from_token_invalid(monkeypatch):
-    monkeypatch.setattr(
-        "src.services.auth.jwt.decode", MagicMock(side_effect=JWTError("invalid"))
-    )
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_email_from_token_invalid(fast_patch):
+    fast_patch(jwt, decode=raising(PyJWTError("invalid")))
     with pytest.raises(HTTPBadRequestException):
         await get_email_from_token("badtoken")
 
 
-@pytest.mark.asyncio
-async def test_create_access_token_with_custom_expiration():
-    payload = {"sub": "customuser"}
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_email_from_token_malformed():
+    with pytest.raises(HTTPBadRequestException) as exc_info:
+        await get_email_from_token("invalid_token")
+    assert exc_info.value.status_code == 400
+    assert exc_info.value.detail == "Invalid or expired token"
+
+
+def test_create_token_expires_seven_days_after_issue():
+    token = create_token({"sub": "test@example.com"})
+    decoded = decode_token(token)
+
+    assert decoded["sub"] == "test@example.com"
+    assert decoded["exp"] - decoded["iat"] == 7 * 24 * 60 * 60
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_create_access_token_with_custom_expiration(fast_patch):
+    mock_encode = MagicMock(return_value="signed.token")
+    fast_patch(jwt, encode=mock_encode)
     expires_in = 60
-    token = await create_access_token(payload, expires_delta=expires_in)
-    decoded = jwt.decode(
-        token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM]
-    )
 
-    assert decoded["sub"] == "customuser"
-    assert "exp" in decoded
+    token = await create_access_token({"sub": "customuser"}, expires_delta=expires_in)
+
+    assert token == "signed.token"
+    claims, secret = mock_encode.call_args.args
+    assert claims["sub"] == "customuser"
+    assert secret == settings.JWT_SECRET
+    assert mock_encode.call_args.kwargs == {"algorithm": settings.JWT_ALGORITHM}
     expected_exp = datetime.now(UTC) + timedelta(seconds=expires_in)
-    actual_exp = datetime.fromtimestamp(decoded["exp"], tz=UTC)
+    actual_exp = datetime.fromtimestamp(claims["exp"], tz=UTC)
     delta = abs((actual_exp - expected_exp).total_seconds())
     assert delta < 5
 
 
-@pytest.mark.asyncio
-async def test_get_current_user_invalid_token(monkeypatch):
-    def mock_jwt_decode(token, secret, algorithms):
-        raise JWTError("Invalid token format")
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_invalid_token(fast_patch):
+    def mock_jwt_decode(token, secret, algorithms, options=None):
+        raise PyJWTError("Invalid token format")
+
+    fast_patch(jwt, decode=mock_jwt_decode)
+    fast_patch(auth_module, get_cached_current_user=AsyncMock())
+    with pytest.raises(HTTPUnauthorizedException) as exc:
+        await get_current_user(
+            token="fake.token.here", user_service=AsyncMock(), app_settings=settings
+        )
+    assert "Could not validate credentials" in str(exc.value)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_user_not_found(fast_patch):
+    fast_patch(jwt, decode=lambda *args, **kwargs: {"sub": "testuser"})
+    fast_patch(auth_module, get_cached_current_user=AsyncMock(return_value=None))
+    mock_user_service = AsyncMock()
+    mock_user_service.get_user_by_username = AsyncMock(return_value=None)
+    fast_patch(auth_module, update_cached_current_user=AsyncMock())
+    with pytest.raises(HTTPUnauthorizedException) as exc:
+        await get_current_user(
+            token="valid.token.here",
+            user_service=mock_user_service,
+            app_settings=settings,
+        )
+
+    assert "Could not validate credentials" in str(exc.value)
+
 
-    monkeypatch.setattr("src.services.auth.jwt.decode", mock_jwt_decode)
-    monkeypatch.setattr("src.services.auth.get_cached_current_user", AsyncMock())
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_username_is_none(fast_patch):
+    fast_patch(jwt, decode=lambda *args, **kwargs: {"sub": None})
+    fast_patch(auth_module, get_cached_current_user=AsyncMock())
+    fast_patch(auth_module, update_cached_current_user=AsyncMock())
     with pytest.raises(HTTPUnauthorizedException) as exc:
-        await get_current_user(token="fake.token.here", db=AsyncMock())
+        await get_current_user(
+            token="valid.token.without.username",
+            user_service=AsyncMock(),
+            app_settings=settings,
+        )
+
     assert "Could not validate credentials" in str(exc.value)
 
 
-@pytest.mark.asyncio
-async def test_get_current_user_user_not_found(monkeypatch):
+def test_hash_uses_argon2_and_verifies():
+    hashed = Hash().get_password_hash("secret")
+    assert hashed.startswith("$argon2id$")
+    assert Hash().verify_password("secret", hashed)
+    assert not Hash().verify_password("wrong", hashed)
+
+
+def test_hash_verify_delegates_to_context(monkeypatch):
+    mock_verify = MagicMock(return_value=True)
+    monkeypatch.setattr(Hash.pwd_context, "verify", mock_verify)
+    assert Hash().verify_password("secret", "hashed")
+    mock_verify.assert_called_once_with("secret", "hashed")
+
+
+def test_hash_verifies_legacy_bcrypt():
+    legacy = Hash.pwd_context.handler("bcrypt").hash("secret")
+    assert Hash().verify_password("secret", legacy)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_password_helpers_run_off_loop():
+    hashed = await get_password_hash("secret")
+    assert await verify_password("secret", hashed)
+    assert not await verify_password("wrong", hashed)
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_reuses_token_cache(monkeypatch):
+    mock_user = User(id=1, username="testuser", role=UserRole.USER)
+    mock_decode = MagicMock(return_value={"sub": "testuser"})
     monkeypatch.setattr(
-        "src.services.auth.jwt.decode", MagicMock(return_value={"sub": "testuser"})
+        "src.services.auth.get_cached_current_user", AsyncMock(return_value=mock_user)
     )
-    monkeypatch.setattr(
-        "src.services.auth.get_cached_current_user", AsyncMock(return_value=None)
+    monkeypatch.setattr("src.services.auth.jwt.decode", mock_decode)
+
+    first = await get_current_user(
+        token="cachedtoken", user_service=AsyncMock(), app_settings=settings
+    )
+    second = await get_current_user(
+        token="cachedtoken", user_service=AsyncMock(), app_settings=settings
+    )
+
+    assert first is second is mock_user
+    mock_decode.assert_called_once()
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_token_cache_respects_exp(monkeypatch):
+    mock_user = User(id=1, username="testuser", role=UserRole.USER)
+    expired_at = datetime.now(UTC).timestamp() - 1
+    mock_decode = MagicMock(
+        side_effect=[{"sub": "testuser", "exp": expired_at}, PyJWTError("expired")]
     )
-    mock_user_service = AsyncMock()
-    mock_user_service.get_user_by_username = AsyncMock(return_value=None)
     monkeypatch.setattr(
-        "src.services.auth.UserService", MagicMock(return_value=mock_user_service)
+        "src.services.auth.get_cached_current_user", AsyncMock(return_value=mock_user)
     )
-    monkeypatch.setattr("src.services.auth.update_cached_current_user", AsyncMock())
-    with pytest.raises(HTTPUnauthorizedException) as exc:
-        await get_current_user(token="valid.token.here", db=AsyncMock())
+    monkeypatch.setattr("src.services.auth.jwt.decode", mock_decode)
 
-    assert "Could not validate credentials" in str(exc.value)
+    await get_current_user(
+        token="expiringtoken", user_service=AsyncMock(), app_settings=settings
+    )
+    with pytest.raises(HTTPUnauthorizedException):
+        await get_current_user(
+            token="expiringtoken", user_service=AsyncMock(), app_settings=settings
+        )
+
+    assert mock_decode.call_count == 2
 
 
-@pytest.mark.asyncio
-async def test_get_current_user_username_is_none(monkeypatch):
+@pytest.mark.asyncio(loop_scope="module")
+async def test_invalidate_cached_tokens(monkeypatch):
+    mock_user = User(id=1, username="testuser", role=UserRole.USER)
+    mock_decode = MagicMock(return_value={"sub": "testuser"})
     monkeypatch.setattr(
-        "src.services.auth.jwt.decode", MagicMock(return_value={"sub": None})
+        "src.services.auth.get_cached_current_user", AsyncMock(return_value=mock_user)
     )
-    monkeypatch.setattr("src.services.auth.get_cached_current_user", AsyncMock())
-    monkeypatch.setattr("src.services.auth.UserService", MagicMock())
-    monkeypatch.setattr("src.services.auth.update_cached_current_user", AsyncMock())
-    with pytest.raises(HTTPUnauthorizedException) as exc:
-        await get_current_user(token="valid.token.without.username", db=AsyncMock())
+    monkeypatch.setattr("src.services.auth.jwt.decode", mock_decode)
 
-    assert "Could not validate credentials" in str(exc.value)
+    await get_current_user(
+        token="cachedtoken", user_service=AsyncMock(), app_settings=settings
+    )
+    invalidate_cached_tokens("testuser")
+    await get_current_user(
+        token="cachedtoken", user_service=AsyncMock(), app_settings=settings
+    )
+
+    assert mock_decode.call_count == 2
+
+
+@pytest.mark.asyncio(loop_scope="module")
+async def test_get_current_user_rejects_token_without_exp():
+    token = jwt.encode(
+        {"sub": "testuser"}, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM
+    )
+    with pytest.raises(HTTPUnauthorizedException):
+        await get_current_user(
+            token=token, user_service=AsyncMock(), app_settings=settings
+        )
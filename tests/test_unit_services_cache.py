@@ -1,8 +1,35 @@
+import asyncio
 import pytest
-import json
-from unittest.mock import AsyncMock
-from src.database.models import User
-from src.services.cache import update_cached_current_user, get_cached_current_user
+import orjson
+from unittest.mock import AsyncMock, MagicMock
+from src.database.models import User, UserRole
+from src.services.cache import (
+    batch,
+    CachedUser,
+    CircuitBreaker,
+    _local_user_cache,
+    update_cached_current_user,
+    get_cached_current_user,
+    patch_cached_user,
+    cache_user_lookup,
+    get_cached_user_lookup,
+    invalidate_cached_user_lookup,
+    listen_for_user_invalidations,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_local_user_cache():
+    _local_user_cache.clear()
+    yield
+    _local_user_cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_redis_breaker(monkeypatch):
+    breaker = CircuitBreaker()
+    monkeypatch.setattr("src.services.cache.redis_breaker", breaker)
+    return breaker
 
 
 @pytest.fixture
@@ -23,65 +50,399 @@ def user():
     )
 
 
-@pytest.mark.asyncio
-async def test_update_cached_current_user(mock_redis, user, monkeypatch):
+@pytest.fixture
+def mock_pipeline(mock_redis):
+    mock_pipeline = MagicMock()
+    for command in ("set", "hset", "hgetall", "expire", "delete", "publish"):
+        getattr(mock_pipeline, command).return_value = mock_pipeline
+    mock_pipeline.execute = AsyncMock()
+    mock_redis.pipeline = MagicMock(return_value=mock_pipeline)
+    return mock_pipeline
+
+
+async def test_update_cached_current_user(mock_redis, mock_pipeline, user, monkeypatch):
     monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
     await update_cached_current_user(user)
     expected_data = {
-        "id": user.id,
+        "id": "1",
         "username": user.username,
         "email": user.email,
-        "role": user.role,
+        "role": "user",
         "avatar": user.avatar,
-        "confirmed": user.confirmed,
+        "confirmed": "1",
     }
-    mock_redis.set.assert_awaited_once_with(
-        f"user:{user.username}", json.dumps(expected_data), ex=60
+    mock_redis.pipeline.assert_called_once_with(transaction=True)
+    mock_pipeline.delete.assert_called_once_with(f"user:cur:{user.username}".encode())
+    mock_pipeline.hset.assert_called_once_with(
+        f"user:cur:{user.username}".encode(), mapping=expected_data
+    )
+    mock_pipeline.expire.assert_called_once_with(
+        f"user:cur:{user.username}".encode(), 60
     )
+    mock_pipeline.publish.assert_called_once_with("user:invalidate", user.username)
+    mock_pipeline.execute.assert_awaited_once()
 
 
-@pytest.mark.asyncio
-async def test_get_cached_current_user_success(mock_redis, user, monkeypatch):
+async def test_update_cached_current_user_skips_missing_avatar(
+    mock_redis, mock_pipeline, user, monkeypatch
+):
     monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
-    user_data = {
-        "id": user.id,
-        "username": user.username,
-        "email": user.email,
-        "role": user.role,
-        "avatar": user.avatar,
-        "confirmed": user.confirmed,
-    }
-    mock_redis.get.return_value = json.dumps(user_data)
+    user.avatar = None
+    await update_cached_current_user(user)
+
+    assert "avatar" not in mock_pipeline.hset.call_args.kwargs["mapping"]
+
+
+async def test_patch_cached_user(mock_redis, mock_pipeline, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    await patch_cached_user("testuser", avatar="http://new.url", confirmed=True)
+
+    mock_pipeline.hset.assert_called_once_with(
+        b"user:cur:testuser", mapping={"avatar": "http://new.url", "confirmed": "1"}
+    )
+    mock_pipeline.expire.assert_called_once_with(b"user:cur:testuser", 60)
+    mock_pipeline.publish.assert_called_once_with("user:invalidate", "testuser")
+    mock_pipeline.delete.assert_not_called()
+    mock_redis.set.assert_not_awaited()
+
+
+async def test_get_cached_current_user_success(
+    mock_redis, mock_pipeline, user, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.return_value = [
+        {
+            "id": "1",
+            "username": user.username,
+            "email": user.email,
+            "role": "user",
+            "avatar": user.avatar,
+            "confirmed": "1",
+        }
+    ]
     result = await get_cached_current_user(username=user.username)
 
     assert result is not None
-    assert isinstance(result, User)
+    assert isinstance(result, CachedUser)
     assert result.id == user.id
     assert result.username == user.username
     assert result.email == user.email
-    assert result.role == user.role
+    assert result.role is UserRole.USER
     assert result.avatar == user.avatar
-    assert result.confirmed == user.confirmed
-    mock_redis.get.assert_awaited_once_with(f"user:{user.username}")
+    assert result.confirmed is True
+    mock_pipeline.hgetall.assert_called_once_with(f"user:cur:{user.username}".encode())
 
 
-@pytest.mark.asyncio
-async def test_get_cached_current_user_not_found(mock_redis, monkeypatch):
+async def test_get_cached_current_user_served_locally_after_first_read(
+    mock_redis, mock_pipeline, user, monkeypatch
+):
     monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
-    mock_redis.get.return_value = None
+    mock_pipeline.execute.return_value = [
+        {"id": "1", "username": user.username, "email": user.email, "role": "user"}
+    ]
+    first = await get_cached_current_user(username=user.username)
+    second = await get_cached_current_user(username=user.username)
+
+    assert second is first
+    mock_pipeline.execute.assert_awaited_once()
+
+
+async def test_patch_cached_user_drops_local_entry(
+    mock_redis, mock_pipeline, user, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    _local_user_cache[user.username] = user
+    await patch_cached_user(user.username, avatar="http://new.url")
+
+    assert user.username not in _local_user_cache
+
+
+async def test_get_cached_current_user_not_found(
+    mock_redis, mock_pipeline, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.return_value = [{}]
     result = await get_cached_current_user(username="nonexistent")
 
     assert result is None
-    mock_redis.get.assert_awaited_once_with("user:nonexistent")
+    mock_pipeline.hgetall.assert_called_once_with(b"user:cur:nonexistent")
+
+
+async def test_get_cached_current_user_ignores_partial_hash(
+    mock_redis, mock_pipeline, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.return_value = [{"avatar": "http://new.url"}]
 
+    assert await get_cached_current_user(username="testuser") is None
 
-@pytest.mark.asyncio
-async def test_get_cached_current_user_invalid_json(mock_redis, monkeypatch, capsys):
+
+async def test_get_cached_current_user_invalid_data(
+    mock_redis, mock_pipeline, monkeypatch, caplog
+):
     monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
-    mock_redis.get.return_value = "invalid_json_data"
+    mock_pipeline.execute.return_value = [
+        {"id": "1", "username": "testuser", "email": "a@b.c", "role": "root"}
+    ]
     result = await get_cached_current_user(username="testuser")
 
     assert result is None
-    mock_redis.get.assert_awaited_once_with("user:testuser")
-    captured = capsys.readouterr()
-    assert "Failed to decode user data from cache" in captured.out
+    assert "Failed to decode user data from cache" in caplog.text
+
+
+async def test_get_cached_current_user_batches_concurrent_reads(
+    mock_redis, mock_pipeline, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.side_effect = lambda: [
+        {
+            "id": "1",
+            "username": call.args[0].removeprefix(b"user:cur:").decode(),
+            "email": "test@example.com",
+            "role": "admin",
+        }
+        for call in mock_pipeline.hgetall.call_args_list
+    ]
+    first, second, again = await asyncio.gather(
+        get_cached_current_user("alice"),
+        get_cached_current_user("bob"),
+        get_cached_current_user("alice"),
+    )
+
+    assert [first.username, second.username, again.username] == [
+        "alice",
+        "bob",
+        "alice",
+    ]
+    assert [call.args[0] for call in mock_pipeline.hgetall.call_args_list] == [
+        b"user:cur:alice",
+        b"user:cur:bob",
+    ]
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    mock_pipeline.execute.assert_awaited_once()
+
+
+async def test_get_cached_current_user_degrades_on_redis_error(
+    mock_redis, mock_pipeline, monkeypatch, caplog
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.side_effect = ConnectionError("redis down")
+
+    assert await get_cached_current_user("alice") is None
+    assert "Redis call failed" in caplog.text
+
+
+async def test_circuit_breaker_opens(mock_redis, mock_pipeline, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.side_effect = ConnectionError("redis down")
+
+    for _ in range(5):
+        assert await get_cached_current_user("alice") is None
+
+    assert await get_cached_current_user("alice") is None
+    assert mock_pipeline.execute.await_count == 5
+
+
+async def test_circuit_breaker_skips_cache_writes_while_open(
+    mock_redis, mock_pipeline, user, fresh_redis_breaker, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    for _ in range(5):
+        fresh_redis_breaker.record_failure()
+
+    await update_cached_current_user(user)
+    await cache_user_lookup(user)
+    await invalidate_cached_user_lookup(user.email, user.username)
+    assert await get_cached_user_lookup("user:lookup:name:testuser") is None
+
+    mock_pipeline.execute.assert_not_awaited()
+    mock_redis.get.assert_not_awaited()
+    mock_redis.delete.assert_not_awaited()
+
+
+async def test_concurrent_reads_count_one_failed_round_trip(
+    mock_redis, mock_pipeline, fresh_redis_breaker, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.side_effect = ConnectionError("redis down")
+    results = await asyncio.gather(
+        *(get_cached_current_user(f"user{i}") for i in range(5))
+    )
+
+    assert results == [None] * 5
+    assert not fresh_redis_breaker.is_open
+
+
+@pytest.mark.parametrize(
+    "write",
+    [
+        lambda user: update_cached_current_user(user),
+        lambda user: patch_cached_user(user.username, confirmed=True),
+        lambda user: cache_user_lookup(user),
+        lambda user: invalidate_cached_user_lookup(user.email, user.username),
+    ],
+    ids=["update_current", "patch_current", "cache_lookup", "invalidate_lookup"],
+)
+async def test_failed_write_is_swallowed_and_counted(
+    mock_redis, mock_pipeline, user, fresh_redis_breaker, monkeypatch, write
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.side_effect = ConnectionError("redis down")
+    mock_redis.delete.side_effect = ConnectionError("redis down")
+
+    for _ in range(5):
+        await write(user)
+
+    assert fresh_redis_breaker.is_open
+
+
+async def test_failed_batch_is_swallowed(
+    mock_redis, mock_pipeline, fresh_redis_breaker, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_pipeline.execute.side_effect = ConnectionError("redis down")
+
+    async with batch() as pipe:
+        await patch_cached_user("testuser", pipe=pipe, confirmed=True)
+
+    mock_pipeline.execute.assert_awaited_once()
+
+
+async def test_get_cached_user_lookup_degrades_on_redis_error(mock_redis, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_redis.get.side_effect = ConnectionError("redis down")
+
+    assert await get_cached_user_lookup("user:lookup:name:testuser") is None
+
+
+def test_circuit_breaker_resets_after_timeout(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("src.services.cache.time.monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, window=10.0, reset_timeout=30.0)
+
+    breaker.record_failure()
+    now[0] += 11
+    breaker.record_failure()
+    assert not breaker.is_open
+
+    breaker.record_failure()
+    assert breaker.is_open
+
+    now[0] += 30
+    assert not breaker.is_open
+
+
+@pytest.mark.parametrize("username", ["name:alice", "lookup:name:alice"])
+async def test_current_user_key_never_collides_with_lookup_keys(
+    mock_redis, mock_pipeline, user, monkeypatch, username
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    user.username = username
+    await update_cached_current_user(user)
+    current_key = mock_pipeline.hset.call_args.args[0]
+
+    alice = User(id=2, username="alice", email="alice@example.com")
+    await cache_user_lookup(alice)
+    lookup_keys = [call.args[0].encode() for call in mock_pipeline.set.call_args_list]
+
+    assert current_key == b"user:cur:" + username.encode()
+    assert current_key not in lookup_keys
+
+
+async def test_cache_user_lookup(mock_redis, mock_pipeline, user, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    user.password = "hashed"
+    await cache_user_lookup(user)
+
+    keys = [call.args[0] for call in mock_pipeline.set.call_args_list]
+    assert keys == [
+        f"user:lookup:email:{user.email}",
+        f"user:lookup:name:{user.username}",
+    ]
+    assert "password" not in orjson.loads(mock_pipeline.set.call_args.args[1])
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    mock_pipeline.execute.assert_awaited_once()
+    mock_redis.set.assert_not_awaited()
+
+
+async def test_get_cached_user_lookup_success(mock_redis, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_redis.get.return_value = orjson.dumps(
+        {"id": 1, "username": "testuser", "email": "test@example.com"}
+    )
+    result = await get_cached_user_lookup("user:lookup:name:testuser")
+
+    assert isinstance(result, User)
+    assert result.email == "test@example.com"
+    mock_redis.get.assert_awaited_once_with("user:lookup:name:testuser")
+
+
+async def test_get_cached_user_lookup_not_found(mock_redis, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    mock_redis.get.return_value = None
+
+    assert await get_cached_user_lookup("user:lookup:name:nobody") is None
+
+
+async def test_invalidate_cached_user_lookup(mock_redis, monkeypatch):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    await invalidate_cached_user_lookup("test@example.com", "testuser")
+
+    mock_redis.delete.assert_awaited_once_with(
+        "user:lookup:email:test@example.com", "user:lookup:name:testuser"
+    )
+
+
+def test_redis_client_uses_blocking_pool():
+    from redis.asyncio import BlockingConnectionPool
+    from src.conf.config import settings
+    from src.services.cache import redis_client
+
+    pool = redis_client.connection_pool
+    assert isinstance(pool, BlockingConnectionPool)
+    assert pool.max_connections == settings.REDIS_MAX_CONNECTIONS
+    assert pool.connection_kwargs["health_check_interval"] == 30
+
+
+async def test_listen_for_user_invalidations_drops_local_entry(
+    mock_redis, user, monkeypatch
+):
+    async def listen():
+        yield {"type": "subscribe", "data": 1}
+        yield {"type": "message", "data": user.username}
+        raise asyncio.CancelledError
+
+    mock_pubsub = MagicMock()
+    mock_pubsub.subscribe = AsyncMock()
+    mock_pubsub.aclose = AsyncMock()
+    mock_pubsub.listen = listen
+    mock_redis.pubsub = MagicMock(return_value=mock_pubsub)
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    _local_user_cache[user.username] = user
+
+    with pytest.raises(asyncio.CancelledError):
+        await listen_for_user_invalidations()
+
+    assert user.username not in _local_user_cache
+    mock_pubsub.subscribe.assert_awaited_once_with("user:invalidate")
+    mock_pubsub.aclose.assert_awaited_once()
+
+
+async def test_batch_sends_queued_writes_in_one_round_trip(
+    mock_redis, mock_pipeline, monkeypatch
+):
+    monkeypatch.setattr("src.services.cache.redis_client", mock_redis)
+    async with batch() as pipe:
+        await invalidate_cached_user_lookup("test@example.com", "testuser", pipe=pipe)
+        await patch_cached_user("testuser", pipe=pipe, confirmed=True)
+        mock_pipeline.execute.assert_not_awaited()
+
+    mock_redis.pipeline.assert_called_once_with(transaction=False)
+    mock_pipeline.delete.assert_called_once_with(
+        "user:lookup:email:test@example.com", "user:lookup:name:testuser"
+    )
+    mock_pipeline.hset.assert_called_once_with(
+        b"user:cur:testuser", mapping={"confirmed": "1"}
+    )
+    mock_pipeline.execute.assert_awaited_once()
+    mock_redis.delete.assert_not_awaited()
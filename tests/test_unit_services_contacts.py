@@ -1,9 +1,12 @@
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
+from sqlalchemy.exc import IntegrityError
+from src.database.models import Contact
 from src.services.contacts import ContactsService
 from src.schemas.contacts import ContactBase, ContactUpdate
 from src.schemas.users import UserBase
 from src.exceptions.exceptions import (
+    HTTPBadRequestException,
     HTTPNotFoundException,
     HTTPConflictRequestException,
 )
@@ -20,16 +23,28 @@ def user():
     )
 
 
+_MOCK_REPO = AsyncMock()
+_MOCK_REPO_FACTORY = MagicMock(return_value=_MOCK_REPO)
+
+
 @pytest.fixture
 def mock_repo(monkeypatch):
-    repo_mock = AsyncMock()
-    monkeypatch.setattr(
-        "src.services.contacts.ContactsRepository", lambda db, user: repo_mock
-    )
-    return repo_mock
+    _MOCK_REPO.reset_mock(return_value=True, side_effect=True)
+    _MOCK_REPO_FACTORY.reset_mock()
+    monkeypatch.setattr("src.services.contacts.ContactsRepository", _MOCK_REPO_FACTORY)
+    return _MOCK_REPO
+
+
+async def test_repo_built_once(mock_repo, user):
+    db = AsyncMock()
+    service = ContactsService(db=db, user=user)
+    await service.get_by_id(1)
+    await service.update_by_id(1, ContactUpdate(email="updated@example.com"))
+    await service.delete_by_id_returning(1)
+
+    _MOCK_REPO_FACTORY.assert_called_once_with(db, user)
 
 
-@pytest.mark.asyncio
 async def test_get_by_id_found(mock_repo, user):
     mock_repo.get_contact_by_id.return_value = {"id": 1, "email": "a@a.com"}
     service = ContactsService(db=AsyncMock(), user=user)
@@ -38,7 +53,6 @@ async def test_get_by_id_found(mock_repo, user):
     mock_repo.get_contact_by_id.assert_awaited_once_with(1)
 
 
-@pytest.mark.asyncio
 async def test_get_by_id_not_found(mock_repo, user):
     mock_repo.get_contact_by_id.return_value = None
     service = ContactsService(db=AsyncMock(), user=user)
@@ -47,12 +61,8 @@ async def test_get_by_id_not_found(mock_repo, user):
         await service.get_by_id(99)
 
 
-@pytest.mark.asyncio
 async def test_create_conflict(mock_repo, user):
-    mock_repo.get_contact_by_email.return_value = {
-        "id": 1,
-        "email": "exist@example.com",
-    }
+    mock_repo.create.side_effect = IntegrityError("INSERT", {}, Exception("unique"))
     service = ContactsService(db=AsyncMock(), user=user)
 
     with pytest.raises(HTTPConflictRequestException):
@@ -67,9 +77,7 @@ async def test_create_conflict(mock_repo, user):
         )
 
 
-@pytest.mark.asyncio
 async def test_update_by_id_success(mock_repo, user):
-    mock_repo.get_contact_by_id.return_value = {"id": 1, "email": "a@a.com"}
     mock_repo.update.return_value = {"id": 1, "email": "updated@example.com"}
 
     service = ContactsService(db=AsyncMock(), user=user)
@@ -84,11 +92,11 @@ async def test_update_by_id_success(mock_repo, user):
 
     assert result["email"] == "updated@example.com"
     mock_repo.update.assert_awaited_once_with(1, update_data)
+    mock_repo.get_contact_by_id.assert_not_awaited()
 
 
-@pytest.mark.asyncio
 async def test_update_by_id_not_found(mock_repo, user):
-    mock_repo.get_contact_by_id.return_value = None
+    mock_repo.update.return_value = None
     service = ContactsService(db=AsyncMock(), user=user)
 
     with pytest.raises(HTTPNotFoundException):
@@ -104,27 +112,24 @@ async def test_update_by_id_not_found(mock_repo, user):
         )
 
 
-@pytest.mark.asyncio
-async def test_delete_by_id_success(mock_repo, user):
-    mock_repo.get_contact_by_id.return_value = {"id": 1, "email": "a@a.com"}
-    mock_repo.delete.return_value = {"message": "deleted"}
+async def test_delete_by_id_returning_success(mock_repo, user):
+    mock_repo.delete_returning.return_value = 1
     service = ContactsService(db=AsyncMock(), user=user)
-    result = await service.delete_by_id(1)
+    result = await service.delete_by_id_returning(1)
 
-    assert result["message"] == "deleted"
-    mock_repo.delete.assert_awaited_once_with(1)
+    assert result == 1
+    mock_repo.delete_returning.assert_awaited_once_with(1)
+    mock_repo.get_contact_by_id.assert_not_awaited()
 
 
-@pytest.mark.asyncio
-async def test_delete_by_id_not_found(mock_repo, user):
-    mock_repo.get_contact_by_id.return_value = None
+async def test_delete_by_id_returning_not_found(mock_repo, user):
+    mock_repo.delete_returning.return_value = None
     service = ContactsService(db=AsyncMock(), user=user)
 
     with pytest.raises(HTTPNotFoundException):
-        await service.delete_by_id(404)
+        await service.delete_by_id_returning(404)
 
 
-@pytest.mark.asyncio
 async def test_get_all_contacts(mock_repo, user):
     mock_repo.get_all.return_value = [
         {"id": 1, "email": "first@example.com"},
@@ -138,13 +143,64 @@ async def test_get_all_contacts(mock_repo, user):
     assert len(result) == 2
     assert result[0]["email"] == "first@example.com"
     mock_repo.get_all.assert_awaited_once_with(
-        search=None, birthdays_within_days=None, skip=0, limit=10
+        search=None, birthdays_within_days=None, skip=0, limit=10, cursor=None
+    )
+
+
+async def test_get_all_respects_limit(mock_repo, user):
+    page = [{"id": i} for i in range(10)]
+    mock_repo.get_all.return_value = page
+    service = ContactsService(db=AsyncMock(), user=user)
+    result = await service.get_all(skip=900, limit=10)
+
+    assert result is page
+    mock_repo.get_all.assert_awaited_once_with(
+        search=None,
+        birthdays_within_days=None,
+        skip=900,
+        limit=10,
+        cursor=None,
+    )
+
+
+async def test_get_all_pushes_birthday_window_to_repository(mock_repo, user):
+    upcoming = [{"id": 1}]
+    mock_repo.get_all.return_value = upcoming
+    service = ContactsService(db=AsyncMock(), user=user)
+    result = await service.get_all(birthdays_within_days=7, skip=0, limit=100)
+
+    assert result is upcoming
+    mock_repo.get_all.assert_awaited_once_with(
+        search=None,
+        birthdays_within_days=7,
+        skip=0,
+        limit=100,
+        cursor=None,
     )
 
 
-@pytest.mark.asyncio
+async def test_get_all_contacts_with_cursor(mock_repo, user):
+    mock_repo.get_all.return_value = []
+    service = ContactsService(db=AsyncMock(), user=user)
+    cursor = ContactsService.encode_cursor(Contact(id=5, last_name="Wayne"))
+    await service.get_all(limit=10, cursor=cursor)
+
+    mock_repo.get_all.assert_awaited_once_with(
+        search=None,
+        birthdays_within_days=None,
+        skip=None,
+        limit=10,
+        cursor=("Wayne", 5),
+    )
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30=", "WyJhIiwgImIiXQ=="])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(HTTPBadRequestException):
+        ContactsService.decode_cursor(cursor)
+
+
 async def test_create_success(mock_repo, user):
-    mock_repo.get_contact_by_email.return_value = None
     mock_repo.create.return_value = {"id": 2, "email": "new@example.com"}
     service = ContactsService(db=AsyncMock(), user=user)
     contact = ContactBase(
@@ -158,3 +214,23 @@ async def test_create_success(mock_repo, user):
 
     assert result["email"] == "new@example.com"
     mock_repo.create.assert_awaited_once_with(contact)
+    mock_repo.get_contact_by_email.assert_not_awaited()
+
+
+async def test_update_by_id_conflict(mock_repo, user):
+    mock_repo.update.side_effect = IntegrityError("UPDATE", {}, Exception("unique"))
+    service = ContactsService(db=AsyncMock(), user=user)
+
+    with pytest.raises(HTTPConflictRequestException):
+        await service.update_by_id(1, ContactUpdate(email="exist@example.com"))
+
+
+async def test_get_all_with_total(mock_repo, user):
+    mock_repo.get_all_with_total.return_value = ([{"id": 1}], 1)
+    service = ContactsService(db=AsyncMock(), user=user)
+    result = await service.get_all_with_total(skip=0, limit=10)
+
+    assert result == ([{"id": 1}], 1)
+    mock_repo.get_all_with_total.assert_awaited_once_with(
+        search=None, birthdays_within_days=None, skip=0, limit=10
+    )
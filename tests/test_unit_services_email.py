@@ -1,79 +1,97 @@
+import fastapi_mail.config
 import pytest
-from unittest.mock import AsyncMock, MagicMock
+from arq import Retry
 from fastapi_mail.errors import ConnectionErrors
-from src.services.email import send_email, send_reset_email
+from src.services.email import (
+    send_email_task,
+    send_reset_email_task,
+    fm,
+)
+from src.services.queue import enqueue_email
+from conftest import async_spy
 
 
-@pytest.mark.asyncio
-async def test_send_email_success(monkeypatch):
-    mock_send_message = AsyncMock()
+async def test_send_email_task_success(monkeypatch):
+    mock_send_message = async_spy()
     monkeypatch.setattr("src.services.email.FastMail.send_message", mock_send_message)
-    await send_email(
-        email="email@example.com", username="doon", host="https://example.com"
+    await send_email_task(
+        {"job_try": 1},
+        email="email@example.com",
+        username="doon",
+        host="https://example.com",
     )
 
-    mock_send_message.assert_awaited_once()
+    assert len(mock_send_message.calls) == 1
 
 
-@pytest.mark.asyncio
-async def test_send_reset_email(monkeypatch):
-    mock_send_message = AsyncMock()
+async def test_send_reset_email_task_sends_given_token(monkeypatch):
+    mock_send_message = async_spy()
     monkeypatch.setattr("src.services.email.FastMail.send_message", mock_send_message)
-    await send_reset_email(
-        email="email@example.com", token="token", host="https:/example.com"
+    await send_reset_email_task(
+        {"job_try": 1},
+        email="email@example.com",
+        token="reset-token",
+        host="https://example.com",
     )
 
-    mock_send_message.assert_awaited_once()
-
-
-@pytest.mark.asyncio
-async def test_send_email_connection_error(monkeypatch, capsys):
+    ((args, kwargs),) = mock_send_message.calls
+    message = args[1]
+    assert message.recipients == ["email@example.com"]
+    assert message.template_body["token"] == "reset-token"
+    assert kwargs == {"template_name": "reset_password_email.html"}
+
+
+@pytest.mark.parametrize(
+    "task, kwargs",
+    [
+        (send_email_task, {"username": "doon"}),
+        (send_reset_email_task, {"token": "token"}),
+    ],
+    ids=["verify", "reset"],
+)
+async def test_email_tasks_retry_on_connection_error(monkeypatch, task, kwargs):
     async def raise_error(*args, **kwargs):
         raise ConnectionErrors("Simulated connection error")
 
     monkeypatch.setattr("src.services.email.FastMail.send_message", raise_error)
-    await send_email(
-        email="email@example.com", username="doon", host="https://example.com"
-    )
-
-    captured = capsys.readouterr()
-    assert "Simulated connection error" in captured.out
-
-
-@pytest.mark.asyncio
-async def test_send_reset_email_success(monkeypatch):
-    mock_send_message = AsyncMock()
-    monkeypatch.setattr("src.services.email.FastMail.send_message", mock_send_message)
-    await send_reset_email(
-        email="email@example.com", token="sometoken", host="https://example.com"
-    )
+    with pytest.raises(Retry) as exc_info:
+        await task(
+            {"job_try": 2},
+            email="email@example.com",
+            host="https://example.com",
+            **kwargs,
+        )
 
-    mock_send_message.assert_awaited_once()
+    assert exc_info.value.defer_score == 20_000
 
 
-@pytest.mark.asyncio
-async def test_send_reset_email_connection_error(monkeypatch, capsys):
-    async def raise_error(*args, **kwargs):
-        raise ConnectionErrors("Simulated connection error")
+async def test_enqueue_email(mock_email_queue):
+    mock_email_queue.enqueue_job.reset_mock()
+    await enqueue_email("send_email", "email@example.com", job_id="send_email:x")
 
-    monkeypatch.setattr("src.services.email.FastMail.send_message", raise_error)
-    await send_reset_email(
-        email="email@example.com", token="token", host="https://example.com"
+    mock_email_queue.enqueue_job.assert_awaited_once_with(
+        "send_email", "email@example.com", _job_id="send_email:x"
     )
 
-    captured = capsys.readouterr()
-    assert "Simulated connection error" in captured.out
 
+async def test_mail_template_environment_is_built_once(monkeypatch):
+    built = []
+    real_environment = fastapi_mail.config.Environment
 
-@pytest.mark.asyncio
-async def test_send_reset_email_token_generated(monkeypatch):
-    mock_send_message = AsyncMock()
-    mock_create_token = MagicMock(return_value="generated-token")
-    monkeypatch.setattr("src.services.email.FastMail.send_message", mock_send_message)
-    monkeypatch.setattr("src.services.email.create_token", mock_create_token)
-    await send_reset_email(
-        email="email@example.com", token="ignored-token", host="https://example.com"
-    )
+    def counting_environment(*args, **kwargs):
+        built.append(args)
+        return real_environment(*args, **kwargs)
+
+    monkeypatch.setattr(fastapi_mail.config, "Environment", counting_environment)
+    monkeypatch.setattr(fm.config, "_template_env", None)
+    monkeypatch.setattr(fm.config, "SUPPRESS_SEND", True)
+    for _ in range(2):
+        await send_email_task(
+            {"job_try": 1},
+            email="email@example.com",
+            username="doon",
+            host="https://example.com",
+        )
 
-    mock_create_token.assert_called_once_with(payload={"sub": "email@example.com"})
-    mock_send_message.assert_awaited_once()
+    assert len(built) == 1
+    assert fm.config.template_engine() is fm.config.template_engine()
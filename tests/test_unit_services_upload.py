@@ -1,19 +1,17 @@
 import pytest
 from unittest.mock import MagicMock, AsyncMock
-from fastapi import UploadFile
-from io import BytesIO
 from src.services.upload import UploadService, CloudinaryUploadService
 
 
-@pytest.mark.asyncio
 async def test_send_email(monkeypatch):
-    mock_upload_file = AsyncMock()
+    mock_upload_file = MagicMock(return_value="http://mocked_url.com")
     monkeypatch.setattr(
         "src.services.upload.CloudinaryUploadService.upload_file", mock_upload_file
     )
     upload_service = UploadService(CloudinaryUploadService())
-    await upload_service.upload_file(file="file", username="username")
+    result = await upload_service.upload_file(file="file", username="username")
 
+    assert result == "http://mocked_url.com"
     mock_upload_file.assert_called_once_with("file", "username")
 
 
@@ -26,26 +24,47 @@ def test_cloudinary_config(monkeypatch):
     assert isinstance(service, CloudinaryUploadService)
 
 
-def test_cloudinary_upload_file(monkeypatch):
-    mock_upload_response = {"version": "123456"}
-
-    # Mock cloudinary methods
+@pytest.fixture
+def mock_upload_large(monkeypatch):
+    mock_upload_large = MagicMock(return_value={"version": "123456"})
     monkeypatch.setattr(
-        "src.services.upload.cloudinary.uploader.upload",
-        lambda file, public_id, overwrite: mock_upload_response,
+        "src.services.upload.cloudinary.uploader.upload_large", mock_upload_large
     )
+    return mock_upload_large
+
 
+def test_cloudinary_upload_file(monkeypatch, make_upload, mock_upload_large):
     mock_build_url = MagicMock(return_value="http://mocked_url.com")
     monkeypatch.setattr(
         "src.services.upload.cloudinary.CloudinaryImage",
         lambda public_id: MagicMock(build_url=mock_build_url),
     )
 
-    file = UploadFile(filename="test.png", file=BytesIO(b"test"))
+    file = make_upload()
     service = CloudinaryUploadService()
     result = service.upload_file(file=file, username="user1")
 
     assert result == "http://mocked_url.com"
+    mock_upload_large.assert_called_once_with(
+        file.file, public_id="RestApp/user1", overwrite=True, chunk_size=6_000_000
+    )
     mock_build_url.assert_called_once_with(
         width=250, height=250, crop="fill", version="123456"
     )
+
+
+@pytest.mark.parametrize(
+    "size", [1024, 64 * 1024, 1024 * 1024], ids=["1KB", "64KB", "1MB"]
+)
+def test_cloudinary_upload_file_single_sdk_call_for_any_size(
+    monkeypatch, make_upload, mock_upload_large, size
+):
+    monkeypatch.setattr(
+        "src.services.upload.cloudinary.CloudinaryImage",
+        lambda public_id: MagicMock(build_url=MagicMock(return_value="http://url")),
+    )
+    file = make_upload(data=b"x" * size)
+    CloudinaryUploadService().upload_file(file=file, username="user1")
+
+    mock_upload_large.assert_called_once()
+    assert mock_upload_large.call_args.args[0] is file.file
@@ -1,16 +1,20 @@
 import pytest
-from unittest.mock import AsyncMock, patch
+from types import SimpleNamespace
+from unittest.mock import ANY, AsyncMock, patch
 from src.services.users import UserService
 from src.schemas.users import UserCreate, UserUpdate
 from src.database.models import User
 from src.exceptions.exceptions import HTTPNotFoundException
 
 
+_MOCK_REPO = AsyncMock()
+
+
 @pytest.fixture
 def mock_repo(monkeypatch):
-    repo_mock = AsyncMock()
-    monkeypatch.setattr("src.services.users.UserRepository", lambda db: repo_mock)
-    return repo_mock
+    _MOCK_REPO.reset_mock(return_value=True, side_effect=True)
+    monkeypatch.setattr("src.services.users.UserRepository", lambda db: _MOCK_REPO)
+    return _MOCK_REPO
 
 
 @pytest.fixture
@@ -25,7 +29,6 @@ def user_data():
     )
 
 
-@pytest.mark.asyncio
 async def test_create_user(mock_repo):
     mock_repo.create_user.return_value = {"email": "test@example.com"}
     user_create = UserCreate(
@@ -39,7 +42,6 @@ async def test_create_user(mock_repo):
     mock_repo.create_user.assert_awaited_once_with(user_create, "avatar_url")
 
 
-@pytest.mark.asyncio
 async def test_get_user_by_id_found(mock_repo, user_data):
     mock_repo.get_user_by_id.return_value = user_data
     service = UserService(db=AsyncMock())
@@ -49,7 +51,6 @@ async def test_get_user_by_id_found(mock_repo, user_data):
     mock_repo.get_user_by_id.assert_awaited_once_with(1)
 
 
-@pytest.mark.asyncio
 async def test_get_user_by_id_not_found(mock_repo):
     mock_repo.get_user_by_id.return_value = None
     service = UserService(db=AsyncMock())
@@ -58,7 +59,6 @@ async def test_get_user_by_id_not_found(mock_repo):
         await service.get_user_by_id(999)
 
 
-@pytest.mark.asyncio
 async def test_get_user_by_username(mock_repo, user_data):
     mock_repo.get_user_by_username.return_value = user_data
     service = UserService(db=AsyncMock())
@@ -68,7 +68,6 @@ async def test_get_user_by_username(mock_repo, user_data):
     mock_repo.get_user_by_username.assert_awaited_once_with("testuser")
 
 
-@pytest.mark.asyncio
 async def test_get_user_by_email(mock_repo, user_data):
     mock_repo.get_user_by_email.return_value = user_data
     service = UserService(db=AsyncMock())
@@ -78,39 +77,100 @@ async def test_get_user_by_email(mock_repo, user_data):
     mock_repo.get_user_by_email.assert_awaited_once_with("test@example.com")
 
 
-@pytest.mark.asyncio
+async def test_get_user_by_username_from_cache(mock_repo, user_data, monkeypatch):
+    monkeypatch.setattr(
+        "src.services.cache.get_cached_user_lookup", AsyncMock(return_value=user_data)
+    )
+    service = UserService(db=AsyncMock())
+    result = await service.get_user_by_username("testuser")
+
+    assert result == user_data
+    mock_repo.get_user_by_username.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    "method, repo_method, value",
+    [
+        ("get_user_by_username_uncached", "get_user_by_username", "testuser"),
+        ("get_user_by_email_uncached", "get_user_by_email", "test@example.com"),
+    ],
+)
+async def test_uncached_lookups_skip_cache(
+    mock_repo, user_data, monkeypatch, method, repo_method, value
+):
+    mock_cached_lookup = AsyncMock(return_value=user_data)
+    monkeypatch.setattr("src.services.cache.get_cached_user_lookup", mock_cached_lookup)
+    getattr(mock_repo, repo_method).return_value = user_data
+    service = UserService(db=AsyncMock())
+    result = await getattr(service, method)(value)
+
+    assert result.password == "hashed_pwd"
+    getattr(mock_repo, repo_method).assert_awaited_once_with(value)
+    mock_cached_lookup.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    "rows, expected",
+    [
+        ([], (False, False)),
+        ([SimpleNamespace(email="test@example.com", username="other")], (True, False)),
+        (
+            [SimpleNamespace(email="other@example.com", username="testuser")],
+            (False, True),
+        ),
+    ],
+)
+async def test_get_user_by_email_or_username(mock_repo, rows, expected):
+    mock_repo.get_users_by_email_or_username.return_value = rows
+    service = UserService(db=AsyncMock())
+    result = await service.get_user_by_email_or_username("test@example.com", "testuser")
+
+    assert result == expected
+    mock_repo.get_users_by_email_or_username.assert_awaited_once_with(
+        "test@example.com", "testuser"
+    )
+
+
 async def test_update_avatar_url_found(mock_repo, user_data):
-    mock_repo.get_user_by_email.return_value = user_data
-    mock_repo.update_avatar_url.return_value = {
-        "email": "test@example.com",
-        "avatar": "new_url",
-    }
+    user_data.avatar = "new_url"
+    mock_repo.update_avatar_url.return_value = user_data
     service = UserService(db=AsyncMock())
     result = await service.update_avatar_url("test@example.com", "new_url")
 
-    assert result["avatar"] == "new_url"
+    assert result.avatar == "new_url"
     mock_repo.update_avatar_url.assert_awaited_once_with("test@example.com", "new_url")
+    mock_repo.get_user_by_email.assert_not_awaited()
+
+
+async def test_update_avatar_url_patches_cached_user(mock_repo, user_data, monkeypatch):
+    user_data.avatar = "new_url"
+    mock_repo.update_avatar_url.return_value = user_data
+    mock_patch = AsyncMock()
+    monkeypatch.setattr("src.services.users.patch_cached_user", mock_patch)
+    service = UserService(db=AsyncMock())
+    await service.update_avatar_url("test@example.com", "new_url")
+
+    mock_patch.assert_awaited_once_with(user_data.username, pipe=ANY, avatar="new_url")
 
 
-@pytest.mark.asyncio
 async def test_update_avatar_url_not_found(mock_repo):
-    mock_repo.get_user_by_email.return_value = None
+    mock_repo.update_avatar_url.return_value = None
     service = UserService(db=AsyncMock())
 
     with pytest.raises(HTTPNotFoundException):
         await service.update_avatar_url("notfound@example.com", "url")
 
 
-@pytest.mark.asyncio
-async def test_verify_email(mock_repo):
+async def test_verify_email(mock_repo, user_data):
+    mock_repo.verify_email.return_value = user_data
     service = UserService(db=AsyncMock())
     await service.verify_email("test@example.com")
     mock_repo.verify_email.assert_awaited_once_with("test@example.com")
 
 
-@pytest.mark.asyncio
 async def test_update_user(mock_repo, user_data):
     body = UserUpdate(username="updated")
+    mock_repo.get_user_by_id.return_value = user_data
     mock_repo.update_user.return_value = {"username": "updated"}
     service = UserService(db=AsyncMock())
     result = await service.update_user(user_data, body)
@@ -119,7 +179,23 @@ async def test_update_user(mock_repo, user_data):
     mock_repo.update_user.assert_awaited_once_with(user_data, body)
 
 
-@pytest.mark.asyncio
+async def test_update_user_invalidates_lookup_after_commit(
+    mock_repo, user_data, monkeypatch
+):
+    order = []
+    mock_repo.get_user_by_id.return_value = user_data
+    mock_repo.update_user.side_effect = lambda user, body: order.append("commit")
+
+    async def invalidate(email, username):
+        order.append(("invalidate", email, username))
+
+    monkeypatch.setattr("src.services.users.invalidate_cached_user_lookup", invalidate)
+    service = UserService(db=AsyncMock())
+    await service.update_user(user_data, UserUpdate(password="new_hash"))
+
+    assert order == ["commit", ("invalidate", "test@example.com", "testuser")]
+
+
 async def test_create_user_without_avatar(mock_repo):
     user_create = UserCreate(
         username="testuser", email="test@example.com", password="123456", role="user"